@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+
+from crossword import Crossword
+from generate import CrosswordCreator
+
+
+# Strategies to compare, as keyword arguments to `CrosswordCreator.solve`
+STRATEGIES = {
+    "mac": dict(strategy="mac"),
+    "backtrack": dict(strategy="backtrack"),
+    "cbj": dict(strategy="cbj"),
+    "cbj+learn": dict(strategy="cbj", learn=True)
+}
+
+# Dictionaries that ship with the project
+WORD_FILES = ["data/words0.txt", "data/words1.txt", "data/words2.txt"]
+
+
+def generate_structure(height, width, seed=0, density=0.875):
+    """
+    Return the text of a random crossword structure: a grid of open "_"
+    cells and blocked "#" cells, where rows and columns of open cells cross.
+
+    Every other row and column is open to begin with, and each of their
+    cells then stays open with probability `density`, which splits them
+    into words of different lengths.
+    """
+    rng = random.Random(seed)
+    grid = [["#"] * width for _ in range(height)]
+    for i in range(height):
+        for j in range(width):
+            if i % 2 == 0 or j % 2 == 0:
+                if rng.random() < density:
+                    grid[i][j] = "_"
+    return "\n".join("".join(row) for row in grid) + "\n"
+
+
+def synthetic_words(words, count, seed=0):
+    """
+    Return `count` distinct made-up words that follow the letter pairs and
+    lengths of `words`, generated by a first-order Markov chain.
+    """
+    rng = random.Random(seed)
+    words = sorted(words)
+    lengths = [len(word) for word in words]
+    following = dict()
+    for word in words:
+        for a, b in zip(" " + word, word):
+            following.setdefault(a, []).append(b)
+
+    made = set()
+    while len(made) < count:
+        length = rng.choice(lengths)
+        word = ""
+        letter = " "
+        while len(word) < length and letter in following:
+            letter = rng.choice(following[letter])
+            word += letter
+        made.add(word)
+    return made
+
+
+def measure(crossword, options, node_limit):
+    """
+    Solve a crossword with the given `solve` options and return statistics:
+    status, nodes, arc revisions, wall time and peak memory allocated.
+
+    Memory is traced in a second, separate run so that tracing does not
+    slow the timed run.
+    """
+    creator = CrosswordCreator(crossword)
+    start = time.perf_counter()
+    assignment = creator.solve(node_limit=node_limit, **options)
+    elapsed = time.perf_counter() - start
+    if creator.limit_reached:
+        status = "limit"
+    else:
+        status = "solved" if assignment is not None else "unsatisfiable"
+
+    tracemalloc.start()
+    traced = CrosswordCreator(crossword)
+    traced.solve(node_limit=node_limit, **options)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "status": status,
+        "nodes": creator.nodes,
+        "revisions": creator.revisions,
+        "time": elapsed,
+        "peak_memory": peak
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark crossword solving strategies."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 7, 9],
+                        help="side lengths of generated grids")
+    parser.add_argument("--densities", type=float, nargs="+",
+                        default=[0.875],
+                        help="chance of each lattice cell staying open")
+    parser.add_argument("--seeds", type=int, default=3,
+                        help="number of grids of each size and density")
+    parser.add_argument("--words", nargs="+", default=WORD_FILES,
+                        help="files of words, one per line")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[],
+                        help="sizes of made-up dictionaries to add, "
+                             "modelled on the last words file")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES),
+                        choices=list(STRATEGIES), help="strategies to run")
+    parser.add_argument("--node-limit", type=int, default=100000,
+                        help="nodes to try before giving up")
+    parser.add_argument("--json", help="file to write results to as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+
+        # Made-up dictionaries are written out so they load like any other
+        word_files = list(args.words)
+        if args.synthetic:
+            with open(args.words[-1]) as f:
+                base = set(f.read().upper().splitlines())
+            for count in args.synthetic:
+                filename = os.path.join(directory, f"synthetic{count}.txt")
+                with open(filename, "w") as f:
+                    f.write("\n".join(sorted(synthetic_words(base, count))))
+                word_files.append(filename)
+
+        print(f"{'':34}" + "".join(f"{s:>34}" for s in args.strategies))
+        for words in word_files:
+            name = os.path.basename(words)
+            for size in args.sizes:
+                for density in args.densities:
+                    for seed in range(args.seeds):
+                        structure = os.path.join(
+                            directory, f"{size}-{density}-{seed}.txt"
+                        )
+                        with open(structure, "w") as f:
+                            f.write(generate_structure(
+                                size, size, seed, density
+                            ))
+                        crossword = Crossword(structure, words)
+
+                        row = f"{name[:14]:14} {size}x{size} {density} #{seed}"
+                        row = f"{row:34}"
+                        for strategy in args.strategies:
+                            stats = measure(
+                                crossword, STRATEGIES[strategy],
+                                args.node_limit
+                            )
+                            results.append({
+                                "words": name,
+                                "size": size,
+                                "density": density,
+                                "seed": seed,
+                                "variables": len(crossword.variables),
+                                "strategy": strategy,
+                                **stats
+                            })
+                            status = {
+                                "solved": " ", "unsatisfiable": "x",
+                                "limit": ">"
+                            }[stats["status"]]
+                            row += (
+                                f"{stats['nodes']:>9}{status}"
+                                f"{stats['time']:>9.3f} s"
+                                f"{stats['peak_memory'] / 1024:>9.0f} KiB"
+                            )
+                        print(row)
+
+    print()
+    print("x: no solution, >: gave up at the node limit")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "node_limit": args.node_limit,
+                "results": results
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
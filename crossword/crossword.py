@@ -1,3 +1,10 @@
+import mmap
+import os
+import struct
+
+from functools import cached_property
+
+
 class Variable():
 
     ACROSS = "across"
@@ -35,6 +42,263 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+# Header of a saved word index: magic, size and modification time of the
+# words file it was built from, size of the words block, number of masks
+INDEX_MAGIC = b"WORDIDX1"
+INDEX_HEADER = struct.Struct("<8sqqqq")
+
+# Entry of the mask table: length, position, letter, offset and size of the
+# mask's bytes
+INDEX_ENTRY = struct.Struct("<HHIqq")
+
+
+class WordIndex():
+
+    def __init__(self, words):
+        """
+        Number every word so that sets of words can be stored as bitsets.
+        Words of the same length get a contiguous range of numbers.
+        """
+        self.words = sorted(words, key=lambda word: (len(word), word))
+        self.buckets = bucket_words(self.words)
+
+        # Bitset of words of each length with each letter at each position
+        self.masks = dict()
+        for length, (start, count) in self.buckets.items():
+            bits = dict()
+            for k in range(count):
+                word = self.words[start + k]
+                for position, letter in enumerate(word):
+                    key = (length, position, letter)
+                    if key not in bits:
+                        bits[key] = bytearray((count + 7) // 8)
+                    bits[key][k >> 3] |= 1 << (k & 7)
+            for key, flags in bits.items():
+                self.masks[key] = int.from_bytes(flags, "little") << start
+
+        # Masks by position across all lengths, built when first needed
+        self.position_masks = dict()
+
+    @cached_property
+    def ids(self):
+        """Mapping from each word to its number."""
+        return {word: i for i, word in enumerate(self.words)}
+
+    @classmethod
+    def from_file(cls, filename, cache=True):
+        """
+        Return the index of the words in a file, one per line, in any case.
+
+        If `cache` is true, the index is saved next to the file the first
+        time and loaded from there while the file is unchanged.
+        """
+        stat = os.stat(filename)
+        cache_file = f"{filename}.idx"
+        if cache:
+            try:
+                return cls.load(cache_file, stat)
+            except (OSError, ValueError, struct.error):
+                pass
+
+        with open(filename) as f:
+            index = cls(set(f.read().upper().splitlines()))
+        if cache:
+            try:
+                index.save(cache_file, stat)
+            except OSError:
+                pass
+        return index
+
+    def save(self, filename, stat):
+        """
+        Save the index to a file, recording the size and modification time
+        from `stat` of the words file it was built from.
+        """
+        words = "\n".join(self.words).encode("utf-8")
+
+        # Masks are stored relative to the first word of their length
+        table = []
+        masks = []
+        offset = INDEX_HEADER.size + len(words)
+        offset += INDEX_ENTRY.size * len(self.masks)
+        for (length, position, letter), mask in self.masks.items():
+            start, count = self.buckets[length]
+            flags = (mask >> start).to_bytes((count + 7) // 8, "little")
+            table.append(INDEX_ENTRY.pack(
+                length, position, ord(letter), offset, len(flags)
+            ))
+            masks.append(flags)
+            offset += len(flags)
+
+        # Write to a temporary file first so a partial index is never read
+        temporary = f"{filename}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(INDEX_HEADER.pack(
+                INDEX_MAGIC, stat.st_size, stat.st_mtime_ns,
+                len(words), len(table)
+            ))
+            f.write(words)
+            f.writelines(table)
+            f.writelines(masks)
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename, stat=None):
+        """
+        Load an index saved with `save` by memory-mapping the file. If `stat`
+        is given, raise ValueError unless it matches the words file the
+        index was built from.
+        """
+        with open(filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, size, mtime, words_size, count = \
+                    INDEX_HEADER.unpack_from(data)
+                if magic != INDEX_MAGIC:
+                    raise ValueError("not a word index")
+                if stat is not None and (size, mtime) != (
+                    stat.st_size, stat.st_mtime_ns
+                ):
+                    raise ValueError("word index is out of date")
+
+                index = cls.__new__(cls)
+                start = INDEX_HEADER.size
+                words = data[start:start + words_size].decode("utf-8")
+                index.words = words.split("\n") if words else []
+                index.buckets = bucket_words(index.words)
+                index.masks = dict()
+                start += words_size
+                for length, position, letter, offset, size in (
+                    INDEX_ENTRY.iter_unpack(
+                        data[start:start + INDEX_ENTRY.size * count]
+                    )
+                ):
+                    flags = data[offset:offset + size]
+                    index.masks[length, position, chr(letter)] = \
+                        int.from_bytes(flags, "little") \
+                        << index.buckets[length][0]
+        index.position_masks = dict()
+        return index
+
+    def length_mask(self, length):
+        """Return the bitset of all words of the given length."""
+        start, count = self.buckets.get(length, (0, 0))
+        return ((1 << count) - 1) << start
+
+    def letter_mask(self, length, position, letter):
+        """
+        Return the bitset of words of the given length that have `letter`
+        at `position`.
+        """
+        return self.masks.get((length, position, letter), 0)
+
+    def letter_masks(self, position):
+        """
+        Return a dictionary mapping each letter to the bitset of words of any
+        length that have that letter at `position`.
+        """
+        if position not in self.position_masks:
+            masks = dict()
+            for (_, p, letter), mask in self.masks.items():
+                if p == position:
+                    masks[letter] = masks.get(letter, 0) | mask
+            self.position_masks[position] = masks
+        return self.position_masks[position]
+
+    def bitset(self, words):
+        """Return the bitset of a collection of words."""
+        bits = 0
+        for word in words:
+            bits |= 1 << self.ids[word]
+        return bits
+
+    def decode(self, bits):
+        """Yield the words in a bitset, in order of their numbers."""
+        flags = bin(bits)[:1:-1]
+        i = flags.find("1")
+        while i != -1:
+            yield self.words[i]
+            i = flags.find("1", i + 1)
+
+
+def bucket_words(words):
+    """
+    Given words sorted by length, return a dictionary mapping each length to
+    the number of its first word and its number of words.
+    """
+    buckets = dict()
+    start = 0
+    while start < len(words):
+        length = len(words[start])
+        end = start + 1
+        while end < len(words) and len(words[end]) == length:
+            end += 1
+        buckets[length] = (start, end - start)
+        start = end
+    return buckets
+
+
+class Domain():
+    """
+    Set of words from a `WordIndex`, stored as a bitset in `bits`.
+    Supports the set operations used on variable domains.
+    """
+
+    __slots__ = ("index", "bits")
+
+    def __init__(self, index, bits=0):
+        self.index = index
+        self.bits = bits
+
+    def __iter__(self):
+        return self.index.decode(self.bits)
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __contains__(self, word):
+        i = self.index.ids.get(word)
+        return i is not None and (self.bits >> i) & 1 == 1
+
+    def __eq__(self, other):
+        if isinstance(other, Domain):
+            return self.index is other.index and self.bits == other.bits
+        if isinstance(other, (set, frozenset)):
+            return set(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Domain({set(self)!r})"
+
+    def add(self, word):
+        self.bits |= 1 << self.index.ids[word]
+
+    def discard(self, word):
+        if word in self:
+            self.bits ^= 1 << self.index.ids[word]
+
+    def remove(self, word):
+        if word not in self:
+            raise KeyError(word)
+        self.bits ^= 1 << self.index.ids[word]
+
+    def copy(self):
+        return Domain(self.index, self.bits)
+
+
+class Overlaps(dict):
+    """
+    Overlaps keyed by pairs of variables, where missing pairs do not overlap.
+    """
+
+    def __missing__(self, key):
+        return None
+
+
 class Crossword():
 
     def __init__(self, structure_file, words_file):
@@ -57,9 +321,8 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        # Index the vocabulary, loading it from a cache if possible
+        self.index = WordIndex.from_file(words_file)
 
         # Determine variable set
         self.variables = set()
@@ -108,26 +371,35 @@ class Crossword():
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only overlapping pairs are stored; other pairs look up as None.
+        # Variables overlap exactly when they cover a common cell, so index
+        # the variables covering each cell instead of comparing all pairs.
+        cell_variables = dict()
+        for var in self.variables:
+            for k, cell in enumerate(var.cells):
+                cell_variables.setdefault(cell, []).append((var, k))
+
+        self.overlaps = Overlaps()
+        for entries in cell_variables.values():
+            for v1, k1 in entries:
+                for v2, k2 in entries:
+                    if v1 != v2:
+                        self.overlaps[v1, v2] = (k1, k2)
+
+        # Adjacency list: each variable's neighbors along with their overlap
+        self.adjacency = {var: [] for var in self.variables}
+        for (v1, v2), overlap in self.overlaps.items():
+            self.adjacency[v1].append((v2, overlap))
+        self.neighbor_sets = {
+            var: frozenset(v for v, _ in self.adjacency[var])
+            for var in self.variables
+        }
+
+    @cached_property
+    def words(self):
+        """Set of every word in the vocabulary."""
+        return set(self.index.words)
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self.neighbor_sets[var]
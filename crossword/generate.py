@@ -1,6 +1,13 @@
-import sys
+import argparse
+import multiprocessing
+import os
+import random
+import time
 
-from crossword import Variable, Crossword
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from crossword import Variable, Crossword, Domain
 
 class CrosswordCreator():
 
@@ -9,11 +16,32 @@ class CrosswordCreator():
         Create new CSP crossword generate.
         """
         self.crossword = crossword
+        self.index = crossword.index
+
+        # Domains are bitsets over the word index, starting with every word
+        # of the variable's length
         self.domains = {
-            var: self.crossword.words.copy()
+            var: Domain(self.index, self.index.length_mask(var.length))
             for var in self.crossword.variables
         }
 
+        # Number of revise calls that removed at least one word
+        self.revisions = 0
+
+        # Number of values tried during search
+        self.nodes = 0
+
+        # Undo log of (variable, previous bitset) for every domain change
+        self.trail = []
+
+        # Random generator for breaking ordering ties, if any, and an event
+        # that stops the search early when set
+        self.rng = None
+        self.cancel = None
+
+        # Image renderer, created on the first save
+        self.renderer = None
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -47,50 +75,133 @@ class CrosswordCreator():
         """
         Save crossword assignment to an image file.
         """
-        from PIL import Image, ImageDraw, ImageFont
-        cell_size = 100
-        cell_border = 2
-        interior_size = cell_size - 2 * cell_border
-        letters = self.letter_grid(assignment)
+        if self.renderer is None:
+            from render import GridRenderer
+            self.renderer = GridRenderer(self.crossword)
+        self.renderer.save(assignment, filename)
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * cell_size,
-             self.crossword.height * cell_size),
-            "black"
-        )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
+    def solve(self, strategy="mac", learn=False, node_limit=None,
+              workers=None, seed=0):
+        """
+        Enforce node and arc consistency, and then solve the CSP.
 
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
+        `strategy` is "mac" to maintain arc consistency while searching,
+        "cbj" for conflict-directed backjumping, which records nogoods if
+        `learn` is true, "backtrack" for plain chronological backtracking,
+        or "portfolio" to race `workers` randomized searches seeded from
+        `seed` in separate processes.
 
-                rect = [
-                    (j * cell_size + cell_border,
-                     i * cell_size + cell_border),
-                    ((j + 1) * cell_size - cell_border,
-                     (i + 1) * cell_size - cell_border)
-                ]
-                if self.crossword.structure[i][j]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[i][j]:
-                        w, h = draw.textsize(letters[i][j], font=font)
-                        draw.text(
-                            (rect[0][0] + ((interior_size - w) / 2),
-                             rect[0][1] + ((interior_size - h) / 2) - 10),
-                            letters[i][j], fill="black", font=font
-                        )
+        If `node_limit` is given, give up and return None after trying that
+        many values, setting `self.limit_reached`.
+        """
+        if strategy == "portfolio":
+            return self.portfolio(workers, seed)
 
-        img.save(filename)
+        self.nodes = 0
+        self.node_limit = node_limit
+        self.limit_reached = False
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return None
+        self.trail = []
+
+        try:
+            if strategy == "mac":
+                return self.backtrack(dict())
+            elif strategy == "cbj":
+                self.nogoods = dict() if learn else None
+                self.depth = dict()
+                self.owners = dict()
+                return self.backjump(dict())[0]
+            elif strategy == "backtrack":
+                return self.chronological_backtrack(dict())
+            raise ValueError(f"unknown strategy {strategy!r}")
+        except SearchLimit:
+            self.limit_reached = True
+            self.undo(0)
+            return None
+
+    def count_node(self):
+        """
+        Count one more value tried, stopping the search past the node limit
+        or, checking every so often, once the cancel event is set.
+        """
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchLimit()
+        if self.cancel is not None and self.nodes % 256 == 0:
+            if self.cancel.is_set():
+                raise SearchLimit()
+
+    def restarts(self, seed, base=None, strategy="mac"):
+        """
+        Solve with ordering ties broken at random from `seed`. Unless `base`
+        is None, restart the search each time it tries more than `base`
+        times the next term of the Luby sequence of values, so that an
+        unlucky early choice is eventually abandoned.
 
-    def solve(self):
+        Return the assignment, or None if there is none or the search was
+        cancelled, in which case `self.limit_reached` is set.
         """
-        Enforce node and arc consistency, and then solve the CSP.
+        self.rng = random.Random(seed)
+        self.restart_count = 0
+        nodes = 0
+        while True:
+            limit = None
+            if base is not None:
+                limit = base * luby(self.restart_count)
+            assignment = self.solve(strategy, node_limit=limit)
+            nodes += self.nodes
+            cancelled = self.cancel is not None and self.cancel.is_set()
+            if not self.limit_reached or cancelled:
+                break
+            self.restart_count += 1
+        self.nodes = nodes
+        return assignment
+
+    def portfolio(self, workers=None, seed=0):
         """
-        self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        Run differently randomized and restarted searches in a process pool
+        and return the first result, cancelling the other searches. Worker
+        0 searches with the default ordering and no restarts; worker k uses
+        seed `seed` + k and a restart base that doubles every worker, up to
+        an eighth of the workers.
+
+        Statistics of every worker are stored in `self.worker_stats`.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        jobs = [
+            (k, None, None) if k == 0
+            else (k, seed + k, PORTFOLIO_BASE * 2 ** ((k - 1) % 8))
+            for k in range(workers)
+        ]
+
+        manager = multiprocessing.Manager()
+        cancel = manager.Event()
+        with manager, ProcessPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(portfolio_worker, self.crossword, cancel, *job)
+                for job in jobs
+            ]
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+            # Whichever worker finishes first has either found a solution
+            # or searched everything, so the others can stop
+            cancel.set()
+            winner = min(
+                (future.result() for future in done),
+                key=lambda result: result[1]["worker"]
+            )
+            self.worker_stats = sorted(
+                (future.result()[1] for future in futures),
+                key=lambda stats: stats["worker"]
+            )
+
+        assignment, stats = winner
+        self.nodes = stats["nodes"]
+        self.revisions = stats["revisions"]
+        return assignment
 
     def enforce_node_consistency(self):
         """
@@ -98,22 +209,8 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word. 
         """
-        # Variables are keys and sets of invalid words (don't satisfy the variable's unary constraints) are values.
-        words_to_remove = {
-            var : set() for var in self.crossword.variables 
-        }
-
-        # Find the invalid words.
-        for v in self.crossword.variables:
-            for word in self.domains[v]:
-                if len(word) != v.length:
-                    words_to_remove[v].add(word)
-
-        # Remove the invalid words from the domains of each variable.
-        for key in words_to_remove:
-            for value in words_to_remove[key]:
-                self.domains[key].remove(value)
-
+        for var in self.crossword.variables:
+            self.domains[var].bits &= self.index.length_mask(var.length)
 
     def revise(self, x, y):
         """
@@ -124,25 +221,57 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
+        i, j = self.crossword.overlaps[x, y]
+        x_masks = self.index.letter_masks(i)
+        y_bits = self.domains[y].bits
+
+        # Collect the x-words whose overlapping letter appears in some y-word
+        supported = 0
+        for letter, y_mask in self.index.letter_masks(j).items():
+            y_words = y_bits & y_mask
+            if not y_words or letter not in x_masks:
+                continue
 
-        revised = False
+            # A single y-word cannot support itself
+            if y_words & (y_words - 1):
+                supported |= x_masks[letter]
+            else:
+                supported |= x_masks[letter] & ~y_words
+
+        x_bits = self.domains[x].bits
+        if x_bits & supported == x_bits:
+            return False
+        self.set_bits(x, x_bits & supported)
+        self.revisions += 1
+        return True
 
-        # A set to store valid words.
-        valid_words = set()
-        
-        # Find the valid words and store them in the valid_words set.
-        i, j = self.crossword.overlaps[x, y]
-        for y_word in self.domains[y]:
-            for x_word in self.domains[x]:           
-                if x_word != y_word and x_word[i] == y_word[j]:
-                    valid_words.add(x_word)
-                    revised = True
+    def set_bits(self, var, bits):
+        """
+        Replace the domain bitset of `var`, logging the old one for `undo`.
+        """
+        self.trail.append((var, self.domains[var].bits))
+        self.domains[var].bits = bits
 
-        # Set the domain of the variable to be a set of the valid words only.
-        self.domains[x] = valid_words
+    def undo(self, mark):
+        """
+        Undo every domain change logged since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            var, bits = self.trail.pop()
+            self.domains[var].bits = bits
 
-        return revised
+    def snapshot(self):
+        """
+        Return a copy of every domain's bitset, for `restore`.
+        """
+        return {var: domain.bits for var, domain in self.domains.items()}
 
+    def restore(self, snapshot):
+        """
+        Reset every domain to the bitsets saved by `snapshot`.
+        """
+        for var, bits in snapshot.items():
+            self.domains[var].bits = bits
 
     def ac3(self, arcs=None):
         """
@@ -160,19 +289,26 @@ class CrosswordCreator():
                 for y in self.crossword.neighbors(x):
                     arcs.append((x, y))
 
+        # Arcs waiting to be checked, without duplicates.
+        queue = deque(arcs)
+        queued = set(queue)
+
         # Check the consistency of each arc.
-        while len(arcs) > 0:
-            x, y = arcs.pop()
+        while queue:
+            x, y = queue.popleft()
+            queued.discard((x, y))
             if self.revise(x, y):
 
                 # If x's domain if empty, then the problem is unsolvable.
-                if self.domains[x] == 0:
+                if len(self.domains[x]) == 0:
                     return False
 
                 # If a change was made to x'd domain and it is not empty
                 # add other pairs of x and its neighbors except y to the queue, to check their consistency.
                 for z in self.crossword.neighbors(x) - {y}:
-                    arcs.insert(0, (z, x))
+                    if (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
 
         return True
 
@@ -196,11 +332,8 @@ class CrosswordCreator():
         puzzle without conflicting characters); return False otherwise.
         """
         # Check for uniqueness.
-        values = list(assignment.values())
-        for i in range(len(values)):
-            for j in range(i+1, len(values)):
-                if values[i] == values[j]:
-                    return False
+        if len(set(assignment.values())) != len(assignment):
+            return False
 
         # Check if every value has the correct length.
         for key, value in assignment.items():
@@ -208,21 +341,27 @@ class CrosswordCreator():
                 return False
 
         # Check for conflicts.
-        arcs = list()
-        for x in self.crossword.variables:
-            for y in self.crossword.neighbors(x):
-                arcs.append((x, y))
-
         for x in assignment:
-            for y in assignment:
-                if x != y and y in self.crossword.neighbors(x):
-                    i, j = self.crossword.overlaps[x, y]
-                    if assignment[x][i] != assignment[y][j]:
-                            return False
+            for y, (i, j) in self.crossword.adjacency[x]:
+                if y in assignment and assignment[x][i] != assignment[y][j]:
+                    return False
 
         # If the assignment passed all of the three tests, return True.     
         return True
 
+    def consistent_value(self, assignment, var, value, used):
+        """
+        Return True if assigning `value` to `var` keeps a consistent
+        `assignment` consistent. `used` is the set of words already assigned.
+        Only the neighbors of `var` are checked.
+        """
+        if value in used or len(value) != var.length:
+            return False
+        for neighbor, (i, j) in self.crossword.adjacency[var]:
+            if neighbor in assignment and assignment[neighbor][j] != value[i]:
+                return False
+        return True
+
 
     def order_domain_values(self, var, assignment):
         """
@@ -231,18 +370,30 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        domain_values = {
-            word : 0 for word in self.domains[var]
-        }
-
-        for word in domain_values:
-            for neighbor in self.crossword.neighbors(var):
-                if word in self.domains[neighbor] and neighbor not in assignment:
-                    domain_values[word] += 1
-
-        domain_values = dict(sorted(domain_values.items(), key=lambda x:x[1]))
-
-        return list(domain_values.keys())
+        neighbors = []
+        for neighbor, (i, j) in self.crossword.adjacency[var]:
+            if neighbor not in assignment:
+                neighbors.append(
+                    (i, self.domains[neighbor], self.index.letter_masks(j))
+                )
+
+        # Neighbor words that disagree at the overlap are ruled out, as is
+        # the word itself.
+        ruled_out = dict()
+        for word in self.domains[var]:
+            count = 0
+            for i, domain, masks in neighbors:
+                kept = domain.bits & masks.get(word[i], 0)
+                count += len(domain) - kept.bit_count()
+                if word in domain and kept >> self.index.ids[word] & 1:
+                    count += 1
+            ruled_out[word] = count
+
+        # Shuffle first so that the sort breaks ties at random
+        words = list(ruled_out)
+        if self.rng is not None:
+            self.rng.shuffle(words)
+        return sorted(words, key=ruled_out.get)
 
 
     def select_unassigned_variable(self, assignment):
@@ -259,6 +410,11 @@ class CrosswordCreator():
         # The lowest number of mrv.
         mrv_vars = self.find_mrv(assignment)
 
+        # Put ties in a fixed order, since set order depends on string hashes
+        mrv_vars.sort(key=lambda v: (v.i, v.j, v.direction, v.length))
+        if self.rng is not None:
+            self.rng.shuffle(mrv_vars)
+
         if len(mrv_vars) > 1:
             for var in mrv_vars:
                 if len(self.crossword.neighbors(var)) == max_degree:
@@ -291,46 +447,337 @@ class CrosswordCreator():
         """
         if self.assignment_complete(assignment):
             return assignment
-        
+
         var = self.select_unassigned_variable(assignment)
-        for value in self.domains[var]:
+        for value in self.order_domain_values(var, assignment):
+            self.count_node()
+            mark = len(self.trail)
+            assignment[var] = value
+            if self.infer(var, value, assignment):
+                result = self.backtrack(assignment)
+                if result is not None:
+                    return result
+            del assignment[var]
+            self.undo(mark)
+
+        return None
+
+    def infer(self, var, value, assignment):
+        """
+        Maintain arc consistency after assigning `value` to `var`: reduce the
+        domain of `var` to `value`, remove `value` from every other unassigned
+        domain, and propagate with AC-3 from the affected variables.
+
+        Return False as soon as some domain is wiped out.
+        """
+        bit = 1 << self.index.ids[value]
+        self.set_bits(var, bit)
+
+        # Every word may be used only once
+        changed = [var]
+        for other in self.crossword.variables:
+            if other not in assignment and self.domains[other].bits & bit:
+                self.set_bits(other, self.domains[other].bits ^ bit)
+                if not self.domains[other].bits:
+                    return False
+                changed.append(other)
+
+        arcs = [
+            (neighbor, x)
+            for x in changed
+            for neighbor in self.crossword.neighbors(x)
+        ]
+        return self.ac3(arcs)
+
+    def solutions(self, differ=1):
+        """
+        Yield complete assignments one at a time, searching for the next only
+        when it is asked for. Every assignment differs from each one yielded
+        before it in the words of at least `differ` variables.
+
+        With `differ` of 1 the search keeps no record of earlier solutions;
+        otherwise it keeps each one to compare against.
+        """
+        self.nodes = 0
+        self.node_limit = None
+        self.limit_reached = False
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return
+        self.trail = []
+
+        # Earlier solutions, and how many of their words the current partial
+        # assignment shares with each
+        self.found = []
+        self.agreements = []
+        yield from self.enumerate_solutions(dict(), differ)
+
+    def enumerate_solutions(self, assignment, differ):
+        """
+        Yield every complete extension of `assignment` found by backtracking
+        with arc consistency, pruning partial assignments that already share
+        too many words with an earlier solution to differ from it in
+        `differ` variables.
+        """
+        if self.assignment_complete(assignment):
+            if differ > 1:
+                self.found.append(dict(assignment))
+                self.agreements.append(len(assignment))
+            yield dict(assignment)
+            return
+
+        most = len(self.crossword.variables) - differ
+        var = self.select_unassigned_variable(assignment)
+        for value in self.order_domain_values(var, assignment):
+            self.count_node()
+            mark = len(self.trail)
             assignment[var] = value
-            if not self.consistent(assignment):
-                del assignment[var]
+            self.agree(var, value, 1)
+            if (
+                all(count <= most for count in self.agreements)
+                and self.infer(var, value, assignment)
+            ):
+                yield from self.enumerate_solutions(assignment, differ)
+            self.agree(var, value, -1)
+            del assignment[var]
+            self.undo(mark)
+
+    def agree(self, var, value, change):
+        """
+        Add `change` to the agreement count of every earlier solution that
+        also assigns `value` to `var`.
+        """
+        for k, solution in enumerate(self.found):
+            if solution[var] == value:
+                self.agreements[k] += change
+
+    def chronological_backtrack(self, assignment, used=None):
+        """
+        Backtracking Search without inference, trying values in domain order
+        and checking each one against the neighbors already assigned.
+        `used` is the set of words in `assignment`.
+        """
+        if used is None:
+            used = set(assignment.values())
+        if self.assignment_complete(assignment):
+            return assignment
+
+        var = self.select_unassigned_variable(assignment)
+        for value in self.domains[var]:
+            self.count_node()
+            if not self.consistent_value(assignment, var, value, used):
                 continue
-            result = self.backtrack(assignment)
-            if result != None:
+            assignment[var] = value
+            used.add(value)
+            result = self.chronological_backtrack(assignment, used)
+            if result is not None:
                 return result
             del assignment[var]
-        
+            used.discard(value)
+
         return None
-            
 
+    def backjump(self, assignment):
+        """
+        Conflict-directed backjumping: like chronological backtracking, but
+        each variable keeps a conflict set of the assigned variables that
+        ruled out its values. When every value fails, search jumps back to
+        the most recent variable in the conflict set instead of the previous
+        one.
+
+        Return a pair of the complete assignment, or None, and the conflict
+        set explaining the failure.
+        """
+        if self.assignment_complete(assignment):
+            return assignment, set()
 
-def main():
+        var = self.select_unassigned_variable(assignment)
+        conflict = set()
+        for value in self.domains[var]:
+            self.count_node()
+            culprits = self.culprits(assignment, var, value)
+            if culprits:
+                conflict |= culprits
+                continue
+
+            assignment[var] = value
+            self.depth[var] = len(assignment)
+            self.owners[value] = var
+            result, child_conflict = self.backjump(assignment)
+            if result is not None:
+                return result, set()
+            del assignment[var]
+            del self.owners[value]
+
+            # The failure below does not depend on this variable, so jump
+            # straight back past it
+            if var not in child_conflict:
+                return None, child_conflict
+            conflict |= child_conflict - {var}
+
+        # The assignments in the conflict set cannot be extended to `var`
+        if self.nogoods is not None:
+            nogood = frozenset((v, assignment[v]) for v in conflict)
+            for pair in nogood:
+                self.nogoods.setdefault(pair, []).append(nogood)
+        return None, conflict
+
+    def culprits(self, assignment, var, value):
+        """
+        Return the set of assigned variables that rule out assigning `value`
+        to `var`: the earliest assigned neighbor or word owner that
+        conflicts with it, so that backjumping can go as far back as
+        possible, or the variables of a recorded nogood. Return an empty set
+        if `value` is consistent.
+        """
+        conflicting = []
+        if value in self.owners:
+            conflicting.append(self.owners[value])
+        for neighbor, (i, j) in self.crossword.adjacency[var]:
+            if neighbor in assignment and assignment[neighbor][j] != value[i]:
+                conflicting.append(neighbor)
+        if conflicting:
+            return {min(conflicting, key=self.depth.get)}
+
+        # Nogoods that this value would complete
+        if self.nogoods is not None:
+            for nogood in self.nogoods.get((var, value), []):
+                if all(
+                    v == var or assignment.get(v) == word
+                    for v, word in nogood
+                ):
+                    return {v for v, _ in nogood if v != var}
+        return set()
+
+
+# Node limit of the first run of the shortest restart schedule
+PORTFOLIO_BASE = 64
+
+
+def luby(i):
+    """Return the `i`th element (from 0) of the Luby restart sequence."""
+    size, exponent = 1, 0
+    while size < i + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        exponent -= 1
+        i = i % size
+    return 2 ** exponent
+
+
+def portfolio_worker(crossword, cancel, worker, seed, base):
+    """
+    Solve `crossword` with one randomized search of a portfolio, stopping
+    when `cancel` is set. Return the assignment and the search statistics.
+    """
+    creator = CrosswordCreator(crossword)
+    creator.cancel = cancel
+    start = time.perf_counter()
+    if seed is None:
+        assignment = creator.solve()
+        restarts = 0
+    else:
+        assignment = creator.restarts(seed, base)
+        restarts = creator.restart_count
+    stats = {
+        "worker": worker,
+        "seed": seed,
+        "restart_base": base,
+        "restarts": restarts,
+        "nodes": creator.nodes,
+        "revisions": creator.revisions,
+        "time": time.perf_counter() - start,
+        "status": (
+            "cancelled" if creator.limit_reached
+            else "solved" if assignment is not None
+            else "no solution"
+        )
+    }
+    return assignment, stats
+
+
+class SearchLimit(Exception):
+    """Raised when a search tries more values than its node limit."""
+    pass
+
+
+def stream(creator, count, differ, output=None):
+    """
+    Print up to `count` solutions as soon as each is found, saving the nth
+    to `output` with n added before its extension.
+    """
+    root, extension = os.path.splitext(output or "")
+    found = 0
+    for assignment in creator.solutions(differ):
+        found += 1
+        print(f"Solution {found}:")
+        creator.print(assignment)
+        print(flush=True)
+        if output:
+            creator.save(assignment, f"{root}{found}{extension}")
+        if found == count:
+            break
+    if not found:
+        print("No solution.")
 
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+
+def main():
 
     # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    parser = argparse.ArgumentParser(description="Generate a crossword.")
+    parser.add_argument("structure", help="crossword structure file")
+    parser.add_argument("words", help="file of words, one per line")
+    parser.add_argument("output", nargs="?", help="image file to save")
+    parser.add_argument("--strategy",
+                        choices=["mac", "cbj", "backtrack", "portfolio"],
+                        default="mac", help="search strategy")
+    parser.add_argument("--learn", action="store_true",
+                        help="record nogoods with the cbj strategy")
+    parser.add_argument("--workers", type=int,
+                        help="processes for the portfolio strategy")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="first random seed for the portfolio strategy")
+    parser.add_argument("--count", type=int, default=1,
+                        help="number of solutions to generate")
+    parser.add_argument("--differ", type=int, default=1,
+                        help="words in which every two solutions differ")
+    parser.add_argument("--stats", action="store_true",
+                        help="print search statistics")
+    args = parser.parse_args()
 
     # Generate crossword
-    crossword = Crossword(structure, words) 
+    crossword = Crossword(args.structure, args.words)
     creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
-
-    # Print result
-    if assignment is None:
-        print("No solution.")
+    if args.count > 1 or args.differ > 1:
+        if args.strategy != "mac":
+            parser.error("--count and --differ need the mac strategy")
+        stream(creator, args.count, args.differ, args.output)
     else:
-        creator.print(assignment)
-        if output:
-            creator.save(assignment, output)
+        assignment = creator.solve(
+            args.strategy, learn=args.learn,
+            workers=args.workers, seed=args.seed
+        )
+
+        # Print result
+        if assignment is None:
+            print("No solution.")
+        else:
+            creator.print(assignment)
+            if args.output:
+                creator.save(assignment, args.output)
+    if args.stats:
+        print(f"Nodes: {creator.nodes}, revisions: {creator.revisions}")
+        for stats in getattr(creator, "worker_stats", []):
+            print(
+                f"Worker {stats['worker']}: {stats['status']}, "
+                f"seed {stats['seed']}, "
+                f"restart base {stats['restart_base']}, "
+                f"{stats['restarts']} restarts, {stats['nodes']} nodes, "
+                f"{stats['revisions']} revisions, {stats['time']:.3f} s"
+            )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
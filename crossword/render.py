@@ -0,0 +1,124 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+CELL_SIZE = 100
+CELL_BORDER = 2
+FONT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "assets", "fonts", "OpenSans-Regular.ttf"
+)
+FONT_SIZE = 80
+
+
+@lru_cache(maxsize=None)
+def load_font(filename=FONT_FILE, size=FONT_SIZE):
+    """Return a TrueType font, loading each file and size only once."""
+    return ImageFont.truetype(filename, size)
+
+
+class GridRenderer():
+    """
+    Renders assignments of one crossword structure to images.
+
+    The empty grid is drawn once, and each letter is rasterized once into a
+    tile, so rendering an assignment only pastes tiles onto a copy of the
+    grid.
+    """
+
+    def __init__(self, crossword, cell_size=CELL_SIZE,
+                 cell_border=CELL_BORDER, font=None):
+        self.crossword = crossword
+        self.cell_size = cell_size
+        self.cell_border = cell_border
+        self.font = font or load_font()
+
+        # Open cells are drawn with inclusive corners, so tiles are one
+        # pixel wider than the interior
+        self.tile_size = cell_size - 2 * cell_border + 1
+        self.tiles = dict()
+
+        # Black canvas with a white square for every open cell
+        self.background = Image.new(
+            "RGBA",
+            (crossword.width * cell_size, crossword.height * cell_size),
+            "black"
+        )
+        draw = ImageDraw.Draw(self.background)
+        for i in range(crossword.height):
+            for j in range(crossword.width):
+                if crossword.structure[i][j]:
+                    x, y = self.corner(i, j)
+                    draw.rectangle(
+                        [(x, y), (x + self.tile_size - 1,
+                                  y + self.tile_size - 1)],
+                        fill="white"
+                    )
+
+    def corner(self, i, j):
+        """Return the top left pixel of the interior of cell (i, j)."""
+        return (j * self.cell_size + self.cell_border,
+                i * self.cell_size + self.cell_border)
+
+    def tile(self, letter):
+        """Return the tile of a white cell showing `letter`."""
+        if letter not in self.tiles:
+            tile = Image.new("RGBA", (self.tile_size, self.tile_size), "white")
+            draw = ImageDraw.Draw(tile)
+            center = (self.tile_size - 1) / 2
+            draw.text(
+                (center, center), letter,
+                fill="black", font=self.font, anchor="mm"
+            )
+            self.tiles[letter] = tile
+        return self.tiles[letter]
+
+    def render(self, assignment):
+        """Return an image of the crossword filled in with `assignment`."""
+        img = self.background.copy()
+        for variable, word in assignment.items():
+            for (i, j), letter in zip(variable.cells, word):
+                img.paste(self.tile(letter), self.corner(i, j))
+        return img
+
+    def save(self, assignment, filename):
+        """Save an image of `assignment` to a file."""
+        self.render(assignment).save(filename)
+
+
+# Renderer of the current worker process, set by `init_worker`
+worker_renderer = None
+
+
+def init_worker(crossword):
+    global worker_renderer
+    worker_renderer = GridRenderer(crossword)
+
+
+def save_worker(job):
+    assignment, filename = job
+    worker_renderer.save(assignment, filename)
+    return filename
+
+
+def save_all(crossword, assignments, filenames, workers=None):
+    """
+    Save an image of each assignment to the corresponding file, rendering
+    in `workers` processes that each keep their own glyph tiles.
+    Return the list of files written.
+    """
+    jobs = list(zip(assignments, filenames))
+    if workers == 1 or len(jobs) <= 1:
+        renderer = GridRenderer(crossword)
+        for assignment, filename in jobs:
+            renderer.save(assignment, filename)
+        return [filename for _, filename in jobs]
+
+    with ProcessPoolExecutor(
+        workers, initializer=init_worker, initargs=(crossword,)
+    ) as executor:
+        return list(executor.map(save_worker, jobs, chunksize=8))
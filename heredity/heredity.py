@@ -1,6 +1,9 @@
 import csv
 import itertools
 import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
 
 PROBS = {
 
@@ -40,10 +43,47 @@ PROBS = {
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python heredity.py data.csv [name=0|1 ...]")
     people = load_data(sys.argv[1])
 
+    # Extra arguments are observations added one at a time to a session
+    if len(sys.argv) > 2:
+        session = InferenceSession(people)
+        for observation in sys.argv[2:]:
+            person, _, trait = observation.partition("=")
+            if person not in people or trait not in ["0", "1"]:
+                sys.exit(f"Invalid observation: {observation}")
+            elapsed = session.observe(person, trait == "1")
+            print(f"Observed {person}={trait} in {elapsed * 1000:.3f} ms")
+        print_probabilities(session.marginals())
+        return
+
+    # Unrelated families are independent, so each is enumerated on its own
+    groups = [
+        {person: people[person] for person in component}
+        for component in connected_components(people)
+    ]
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(enumerate_probabilities, groups))
+
+    # Combine the marginals of every component, in the order of the file
+    probabilities = dict()
+    for result in results:
+        probabilities.update(result)
+    probabilities = {person: probabilities[person] for person in people}
+
+    # Print results
+    print_probabilities(probabilities)
+
+
+def enumerate_probabilities(people, probs=PROBS):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    computed by enumerating every possible joint assignment.
+    """
+    model = compile_model(probs)
+
     # Keep track of gene and trait probabilities for each person
     probabilities = {
         person: {
@@ -78,14 +118,22 @@ def main():
             for two_genes in powerset(names - one_gene):
 
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
+                p = joint_probability(
+                    people, one_gene, two_genes, have_trait, model=model
+                )
                 update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
 
-    # Print results
-    for person in people:
+    return probabilities
+
+
+def print_probabilities(probabilities):
+    """
+    Print the gene and trait distribution of every person.
+    """
+    for person in probabilities:
         print(f"{person}:")
         for field in probabilities[person]:
             print(f"  {field.capitalize()}:")
@@ -116,6 +164,42 @@ def load_data(filename):
     return data
 
 
+def connected_components(people):
+    """
+    Return a list of components of the pedigree, each being a list of names
+    of people linked to one another through mother or father relations.
+    Names keep the order in which they appear in `people`.
+    """
+    relatives = {person: set() for person in people}
+    for person in people:
+        for parent in [people[person]["mother"], people[person]["father"]]:
+            if parent is not None:
+                relatives[person].add(parent)
+                relatives[parent].add(person)
+
+    order = {person: i for i, person in enumerate(people)}
+    components = []
+    seen = set()
+    for person in people:
+        if person in seen:
+            continue
+
+        # Collect everyone reachable from this person
+        seen.add(person)
+        frontier = [person]
+        component = []
+        while frontier:
+            current = frontier.pop()
+            component.append(current)
+            for relative in relatives[current]:
+                if relative not in seen:
+                    seen.add(relative)
+                    frontier.append(relative)
+
+        components.append(sorted(component, key=order.get))
+    return components
+
+
 def powerset(s):
     """
     Return a list of all possible subsets of set s.
@@ -128,7 +212,8 @@ def powerset(s):
     ]
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def joint_probability(people, one_gene, two_genes, have_trait, probs=PROBS,
+                      model=None):
     """
     Compute and return a joint probability.
 
@@ -138,100 +223,32 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in `one_gene` or `two_gene` does not have the gene, and
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
-    """       
 
-    j_prob_parts = list()
-    zero_gene = set(p for p in people if p not in one_gene and p not in two_genes)
-    gene_groups = [zero_gene, one_gene, two_genes]
+    Callers in a loop should pass the `CompiledModel` of `probs` as `model`.
+    """
+    if model is None:
+        model = compile_model(probs)
+    genes = {
+        person: (2 if person in two_genes else 1 if person in one_gene else 0)
+        for person in people
+    }
 
-    
+    j_probability = 1
     for person in people:
+        g = genes[person]
+        mother = people[person]["mother"]
+        father = people[person]["father"]
 
-        # For people who have no parents
-        if people[person]["mother"] == None and people[person]["father"] == None:
-
-            for i in range(len(gene_groups)):
-                if person in gene_groups[i]:
-
-                    j_prob_parts.append(PROBS["gene"][i])
-                    j_prob_parts.append(PROBS["trait"][i][True] if person in have_trait else PROBS["trait"][i][False])
-                    break
-
-
-        # For people who have parents
+        # People with no parents follow the unconditional gene distribution
+        if mother is None and father is None:
+            j_probability *= model.gene_prior[g]
         else:
+            j_probability *= model.inheritance[
+                model.inheritance_index(g, genes[mother], genes[father])
+            ]
 
-            parents = {
-                "mother": people[person]["mother"],
-                "father": people[person]["father"]
-            }
-
-            # This list holds the values of passing probabilities when the copies the parent posses are 0 or 1 or 2 respectively
-            pass_prob = [PROBS["mutation"], 0.5, 1 - PROBS["mutation"]]
-
-
-            # If the child posses one copy of the gene
-            if person in one_gene:
-
-                # This list is made to calculate the two parts of the equation easily: (father * not mother) + (not father * mother)
-                parents_probs = [1, 1]
-
-                # These two variables are made to travel between the two variables of the list above 
-                counter = 0
-                x = 0
-                
-                # Calculate the probability that the child has 1 copy of the gene
-                for parent in parents:
-
-                    for i in range(len(gene_groups)):
-                        if parents[parent] in gene_groups[i]:
-
-                            parents_probs[counter] *= pass_prob[i]
-                            parents_probs[x if x != counter else x + 1] *= (1 - pass_prob[i])
-                      
-                    counter += 1
-                
-                j_prob_parts.append(sum(parents_probs))
-
-            # If the child posses two copies of the gene
-            elif person in two_genes:
-
-                # Calculate the probability that the child has 2 copies of the gene
-                for parent in parents:
-
-                    for i in range(len(gene_groups)):
-
-                        if parents[parent] in gene_groups[i]:
-
-                            j_prob_parts.append(pass_prob[i])
-                            break
-
-            # If the child posses no copies of the gene  
-            else:
-
-                # Calculate the probability that the child has no copies of the gene
-                for parent in parents:
-
-                    for i in range(len(gene_groups)):
-
-                        if parents[parent] in gene_groups[i]:
-
-                            j_prob_parts.append(1 - pass_prob[i])
-                            break
-
-            # Cacluate the "trait" probability of the child
-            for i in range(len(gene_groups)):
-
-                if person in gene_groups[i]:
-
-                    j_prob_parts.append(PROBS["trait"][i][True] if person in have_trait else PROBS["trait"][i][False])
-                    break
-
-
-    # Multiplying the parts of the joint probability
-    j_probability = 1
-    for prob in j_prob_parts:
-        j_probability *= prob
+        trait = person in have_trait
+        j_probability *= model.trait[model.trait_index(g, trait)]
 
     return j_probability
 
@@ -279,5 +296,246 @@ def normalize(probabilities):
             probabilities[person]["trait"][trait] /= traits_prob_sum
 
 
+class CompiledModel():
+    """
+    Flat lookup tables derived from a `PROBS`-style dictionary.
+
+    `gene_prior[g]` is the unconditional probability of `g` copies,
+    `inheritance[inheritance_index(g, m, f)]` is the probability that a child
+    has `g` copies given a mother with `m` and a father with `f` copies, and
+    `trait[trait_index(g, t)]` is the probability of trait value `t`
+    given `g` copies.
+    """
+
+    def __init__(self, probs):
+        self.mutation = probs["mutation"]
+        self.gene_prior = tuple(probs["gene"][g] for g in range(3))
+        self.trait = tuple(
+            probs["trait"][g][t] for g in range(3) for t in [False, True]
+        )
+
+        # Probability of passing the gene on, given 0, 1 or 2 copies
+        pass_prob = [self.mutation, 0.5, 1 - self.mutation]
+        inheritance = [0] * 27
+        for mother in range(3):
+            for father in range(3):
+                from_mother = pass_prob[mother]
+                from_father = pass_prob[father]
+                for g, p in enumerate([
+                    (1 - from_mother) * (1 - from_father),
+                    (from_mother * (1 - from_father) +
+                     (1 - from_mother) * from_father),
+                    from_mother * from_father
+                ]):
+                    inheritance[self.inheritance_index(g, mother, father)] = p
+        self.inheritance = tuple(inheritance)
+
+    @staticmethod
+    def inheritance_index(genes, mother_genes, father_genes):
+        return genes + 3 * mother_genes + 9 * father_genes
+
+    @staticmethod
+    def trait_index(genes, trait):
+        return 2 * genes + (1 if trait else 0)
+
+
+# Compiled models, keyed by the probabilities they were built from
+compiled_models = dict()
+
+
+def compile_model(probs=PROBS):
+    """
+    Return the `CompiledModel` for `probs`, building it only the first time
+    a given set of probabilities is seen.
+    """
+    key = (
+        tuple(probs["gene"][g] for g in range(3)),
+        tuple(probs["trait"][g][t] for g in range(3) for t in [False, True]),
+        probs["mutation"]
+    )
+    if key not in compiled_models:
+        compiled_models[key] = CompiledModel(probs)
+    return compiled_models[key]
+
+
+def enumerate_component(people, names, probs=PROBS, model=None):
+    """
+    Return every gene assignment of the people in `names`, as tuples of gene
+    counts in the order of `names`, along with the prior weight of each.
+    Everyone's parents must also be in `names`.
+    """
+    if model is None:
+        model = compile_model(probs)
+    index = {name: i for i, name in enumerate(names)}
+    assignments = list(itertools.product([0, 1, 2], repeat=len(names)))
+    prior = []
+    for genes in assignments:
+        p = 1
+        for person, i in index.items():
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+            if mother is None and father is None:
+                p *= model.gene_prior[genes[i]]
+            else:
+                p *= model.inheritance[model.inheritance_index(
+                    genes[i], genes[index[mother]], genes[index[father]]
+                )]
+        prior.append(p)
+    return assignments, prior
+
+
+class InferenceSession():
+    """
+    Exact inference over a pedigree that can absorb new trait observations
+    one at a time.
+
+    The pedigree is split into unrelated components and the prior weight of
+    every gene assignment of each component is computed once. Traits only
+    depend on a person's own genes, so observing a trait rescales the cached
+    weights of that person's component and leaves the others untouched.
+    """
+
+    def __init__(self, people, parallel=False, probs=PROBS):
+        self.people = people
+        self.probs = probs
+        self.model = compile_model(probs)
+        self.components = connected_components(people)
+
+        # Component number of each person, and their position within it
+        self.component = dict()
+        self.index = dict()
+        for c, names in enumerate(self.components):
+            for i, person in enumerate(names):
+                self.component[person] = c
+                self.index[person] = i
+
+        # Enumerate components in separate processes if asked to
+        groups = [
+            {person: people[person] for person in names}
+            for names in self.components
+        ]
+        if parallel and len(groups) > 1:
+            with ProcessPoolExecutor() as executor:
+                tables = list(executor.map(
+                    enumerate_component, groups, self.components,
+                    [probs] * len(groups), [self.model] * len(groups)
+                ))
+        else:
+            tables = [
+                enumerate_component(group, names, model=self.model)
+                for group, names in zip(groups, self.components)
+            ]
+        self.assignments = [assignments for assignments, _ in tables]
+        self.prior = [prior for _, prior in tables]
+        self.weights = [list(prior) for prior in self.prior]
+
+        # Observed traits, and the time taken by each update in seconds
+        self.evidence = dict()
+        self.timings = []
+        self._marginals = [None for _ in self.components]
+
+        for person in people:
+            if people[person]["trait"] is not None:
+                self.observe(person, people[person]["trait"])
+
+    def observe(self, person, trait):
+        """
+        Record that `person` has (True) or lacks (False) the trait, or
+        forget what was known about them if `trait` is None.
+        Return the time the update took in seconds.
+        """
+        start = time.perf_counter()
+        c = self.component[person]
+        i = self.index[person]
+        previous = self.evidence.get(person)
+
+        if previous is None and trait is not None:
+            # Only the new person's likelihood has to be folded in
+            likelihood = [
+                self.model.trait[self.model.trait_index(g, trait)]
+                for g in range(3)
+            ]
+            weights = self.weights[c]
+            for k, genes in enumerate(self.assignments[c]):
+                weights[k] *= likelihood[genes[i]]
+        elif previous != trait:
+            # Changing or retracting evidence rebuilds weights from the prior
+            if trait is None:
+                del self.evidence[person]
+            else:
+                self.evidence[person] = trait
+            self.weights[c] = [
+                self.prior[c][k] * self.evidence_weight(c, genes)
+                for k, genes in enumerate(self.assignments[c])
+            ]
+
+        if trait is not None:
+            self.evidence[person] = trait
+        self._marginals[c] = None
+
+        elapsed = time.perf_counter() - start
+        self.timings.append(elapsed)
+        return elapsed
+
+    def evidence_weight(self, c, genes):
+        """
+        Return the likelihood of the traits observed in component `c`
+        given a gene assignment of that component.
+        """
+        p = 1
+        for person in self.components[c]:
+            if person in self.evidence:
+                g = genes[self.index[person]]
+                p *= self.model.trait[
+                    self.model.trait_index(g, self.evidence[person])
+                ]
+        return p
+
+    def component_marginals(self, c):
+        """
+        Return the gene and trait distribution of everyone in component `c`.
+        """
+        if self._marginals[c] is not None:
+            return self._marginals[c]
+
+        names = self.components[c]
+        gene_sums = [[0, 0, 0] for _ in names]
+        for k, genes in enumerate(self.assignments[c]):
+            weight = self.weights[c][k]
+            for i, g in enumerate(genes):
+                gene_sums[i][g] += weight
+
+        probabilities = dict()
+        for i, person in enumerate(names):
+            total = sum(gene_sums[i])
+            gene = {g: gene_sums[i][g] / total for g in [2, 1, 0]}
+
+            # Unobserved traits follow from the person's gene distribution
+            if person in self.evidence:
+                has_trait = 1 if self.evidence[person] else 0
+            else:
+                has_trait = sum(
+                    gene[g] * self.model.trait[self.model.trait_index(g, True)]
+                    for g in gene
+                )
+            probabilities[person] = {
+                "gene": gene,
+                "trait": {True: has_trait, False: 1 - has_trait}
+            }
+
+        self._marginals[c] = probabilities
+        return probabilities
+
+    def marginals(self):
+        """
+        Return the gene and trait distribution of every person, in the same
+        format as the `probabilities` dictionary built by `main`.
+        """
+        probabilities = dict()
+        for c in range(len(self.components)):
+            probabilities.update(self.component_marginals(c))
+        return {person: probabilities[person] for person in self.people}
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,111 @@
+import random
+import sys
+import time
+
+from logic import *
+from puzzle import AKnight, AKnave, BKnight, BKnave, CKnight, CKnave
+from puzzle import knowledge0, knowledge1, knowledge2, knowledge3
+
+
+STRATEGIES = ["recursive", "enumeration", "truth_table", "sat", "query_many"]
+
+
+def check(knowledge, query, strategy):
+    if strategy == "recursive":
+        return recursive_model_check(knowledge, query)
+    return model_check(knowledge, query, strategy)
+
+
+def generated_knowledge(n, seed=0):
+    """
+    Returns a random knowledge base over `n` symbols, made of clauses of
+    three literals, along with its symbols.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"S{i}") for i in range(n)]
+    clauses = []
+    for _ in range(2 * n):
+        clause = [rng.choice(symbols) for _ in range(3)]
+        clauses.append(Or(*[
+            s if rng.random() < 0.5 else Not(s) for s in clause
+        ]))
+    return And(*clauses), symbols
+
+
+def biconditional_chain(depth):
+    """
+    Returns the knowledge base S0 <=> (S1 <=> (... <=> S`depth`)), asserted
+    along with S0, and its symbols.
+    """
+    symbols = [Symbol(f"S{i}") for i in range(depth + 1)]
+    chain = symbols[-1]
+    for symbol in reversed(symbols[:-1]):
+        chain = Biconditional(symbol, chain)
+    return And(chain, symbols[0]), symbols
+
+
+def time_queries(knowledge, queries, strategy, repeat):
+    """
+    Returns the average time taken to check every query against knowledge,
+    along with the queries found to be entailed.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if strategy == "query_many":
+            answers = query_many(knowledge, queries)
+            entailed = [q for q, holds in zip(queries, answers) if holds]
+        else:
+            entailed = [q for q in queries if check(knowledge, q, strategy)]
+    return (time.perf_counter() - start) / repeat, entailed
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [max_symbols]")
+    max_symbols = int(sys.argv[1]) if len(sys.argv) == 2 else 16
+
+    symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+    benchmarks = [
+        ("Puzzle 0", knowledge0, symbols, 200),
+        ("Puzzle 1", knowledge1, symbols, 200),
+        ("Puzzle 2", knowledge2, symbols, 200),
+        ("Puzzle 3", knowledge3, symbols, 200)
+    ]
+    for n in range(8, max_symbols + 1, 4):
+        knowledge, generated = generated_knowledge(n)
+        benchmarks.append((f"Random {n}", knowledge, generated[:4], 1))
+
+    print(f"{'':12}" + "".join(f"{s:>14}" for s in STRATEGIES))
+    for name, knowledge, queries, repeat in benchmarks:
+        row = f"{name:12}"
+        answers = set()
+        for strategy in STRATEGIES:
+            elapsed, entailed = time_queries(
+                knowledge, queries, strategy, repeat
+            )
+            answers.add(tuple(entailed))
+            row += f"{elapsed * 1000:>11.3f} ms"
+        if len(answers) != 1:
+            row += "  (strategies disagree)"
+        print(row)
+    print()
+
+    # Deeply nested biconditionals must not make preprocessing exponential
+    for depth in [10, 20, 30]:
+        knowledge, symbols = biconditional_chain(depth)
+        elapsed, _ = time_queries(knowledge, symbols[-1:], "query_many", 1)
+        print(f"Chain {depth:<6}{elapsed * 1000:>11.3f} ms")
+        if elapsed > 1:
+            print("  (preprocessing is too slow)")
+
+    # How much preprocessing shrinks each knowledge base
+    print()
+    for name, knowledge, queries, _ in benchmarks:
+        keep = set().union(*[query.symbols() for query in queries])
+        print(f"{name:12}simplifier {simplify(knowledge, keep)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import array
+import re
+import struct
+import sys
+
+from logic import *
+from sat import CNF, KnowledgeBase
+
+
+# Tokens of the `formula()` syntax, with ASCII alternatives for operators
+TOKEN = re.compile(r"<=>|=>|[()¬~!∧&∨|⊤⊥]|[^()¬~!∧&∨|⊤⊥<=]+")
+NOT = {"¬", "~", "!"}
+AND = {"∧", "&"}
+OR = {"∨", "|"}
+
+
+def build(cls, **fields):
+    """
+    Creates a sentence from already valid parts without running the
+    validating constructor.
+    """
+    sentence = cls.__new__(cls)
+    sentence.__dict__.update(fields)
+    return sentence
+
+
+class FormulaParser():
+    """
+    Parses the syntax produced by `Sentence.formula`.
+
+    From loosest to tightest binding, operators are <=>, => (which groups
+    to the right), ∨, ∧ and ¬. ⊤ and ⊥ are the constants true and false.
+    Symbol names are any text without operators, constants or parentheses,
+    with surrounding whitespace removed.
+    """
+
+    def __init__(self, text):
+        pieces = TOKEN.findall(text)
+        if sum(len(piece) for piece in pieces) != len(text):
+            raise ValueError("unexpected '<' or '=' in formula")
+        self.tokens = [
+            piece.strip() for piece in pieces if not piece.isspace()
+        ]
+        self.position = 0
+        self.symbols = dict()
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def advance(self):
+        token = self.peek()
+        if token is None:
+            raise ValueError("unexpected end of formula")
+        self.position += 1
+        return token
+
+    def parse(self):
+        """Returns the sentence for the whole formula."""
+        if not self.tokens:
+            raise ValueError("empty formula")
+        sentence = self.biconditional()
+        if self.peek() is not None:
+            raise ValueError(f"unexpected {self.peek()!r}")
+        return sentence
+
+    def biconditional(self):
+        sentence = self.implication()
+        while self.peek() == "<=>":
+            self.advance()
+            sentence = build(Biconditional,
+                             left=sentence, right=self.implication())
+        return sentence
+
+    def implication(self):
+        sentence = self.disjunction()
+        if self.peek() == "=>":
+            self.advance()
+            sentence = build(Implication,
+                             antecedent=sentence,
+                             consequent=self.implication())
+        return sentence
+
+    def disjunction(self):
+        disjuncts = [self.conjunction()]
+        while self.peek() in OR:
+            self.advance()
+            disjuncts.append(self.conjunction())
+        if len(disjuncts) == 1:
+            return disjuncts[0]
+        return build(Or, disjuncts=disjuncts)
+
+    def conjunction(self):
+        conjuncts = [self.unary()]
+        while self.peek() in AND:
+            self.advance()
+            conjuncts.append(self.unary())
+        if len(conjuncts) == 1:
+            return conjuncts[0]
+        return build(And, conjuncts=conjuncts)
+
+    def unary(self):
+        token = self.advance()
+        if token in NOT:
+            return build(Not, operand=self.unary())
+        if token == "⊤":
+            return build(And, conjuncts=[])
+        if token == "⊥":
+            return build(Or, disjuncts=[])
+        if token == "(":
+            sentence = self.biconditional()
+            if self.advance() != ")":
+                raise ValueError("expected ')'")
+            return sentence
+        if token in {")", "=>", "<=>"} or token in AND or token in OR:
+            raise ValueError(f"unexpected {token!r}")
+
+        # Symbols with the same name are shared
+        if token not in self.symbols:
+            self.symbols[token] = build(Symbol, name=token)
+        return self.symbols[token]
+
+
+def parse_formula(text):
+    """Returns the sentence written as `text` in `formula()` syntax."""
+    return FormulaParser(text).parse()
+
+
+def read_dimacs(text):
+    """
+    Reads a DIMACS CNF file into a `CNF`. Comment lines of the form
+    "c <variable> <name>", as written by `write_dimacs`, name variables.
+    """
+    cnf = CNF()
+    literals = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("%"):
+            continue
+        if line.startswith("c"):
+            parts = line.split(maxsplit=2)
+            if len(parts) == 3 and parts[1].isdigit():
+                cnf.variables[parts[2]] = int(parts[1])
+                cnf.names[int(parts[1])] = parts[2]
+            continue
+        if line.startswith("p"):
+            parts = line.split()
+            if len(parts) != 4 or parts[1] != "cnf":
+                raise ValueError(f"invalid problem line {line!r}")
+            cnf.num_vars = int(parts[2])
+            continue
+        literals.extend(int(lit) for lit in line.split())
+
+    # Clauses end with 0 and may span several lines
+    clause = []
+    for lit in literals:
+        if lit == 0:
+            cnf.clauses.append(clause)
+            clause = []
+        else:
+            cnf.num_vars = max(cnf.num_vars, abs(lit))
+            clause.append(lit)
+    if clause:
+        cnf.clauses.append(clause)
+    return cnf
+
+
+def write_dimacs(cnf):
+    """Returns the clauses of a `CNF` in DIMACS format, naming symbols."""
+    lines = [f"c {var} {name}" for var, name in sorted(cnf.names.items())]
+    lines.append(f"p cnf {cnf.num_vars} {len(cnf.clauses)}")
+    for clause in cnf.clauses:
+        lines.append(" ".join(str(lit) for lit in clause) + " 0")
+    return "\n".join(lines) + "\n"
+
+
+# Header of the binary format: magic, number of variables, constant
+# variable, size of the names block, and number of literals with separators
+MAGIC = b"KBCNF1\0\0"
+HEADER = struct.Struct("<8sqqqq")
+
+
+def dump_cnf(cnf):
+    """
+    Returns a compact binary encoding of a `CNF`: the header, then symbol
+    names, then every clause as 32-bit literals followed by 0.
+    """
+    names = "\0".join(
+        f"{var}\0{name}" for var, name in sorted(cnf.names.items())
+    ).encode("utf-8")
+    literals = array.array("i")
+    for clause in cnf.clauses:
+        literals.extend(clause)
+        literals.append(0)
+    if literals.itemsize != 4:
+        raise ValueError("platform int is not 32 bits")
+    if sys.byteorder == "big":
+        literals.byteswap()
+    header = HEADER.pack(
+        MAGIC, cnf.num_vars, cnf.true or 0, len(names), len(literals)
+    )
+    return header + names + literals.tobytes()
+
+
+def load_cnf(data):
+    """Returns the `CNF` encoded by `dump_cnf`."""
+    magic, num_vars, true, size, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a compiled knowledge base")
+
+    cnf = CNF()
+    cnf.num_vars = num_vars
+    cnf.true = true or None
+    start = HEADER.size
+    if size:
+        fields = data[start:start + size].decode("utf-8").split("\0")
+        for var, name in zip(fields[::2], fields[1::2]):
+            cnf.variables[name] = int(var)
+            cnf.names[int(var)] = name
+
+    literals = array.array("i")
+    literals.frombytes(data[start + size:start + size + 4 * count])
+    if sys.byteorder == "big":
+        literals.byteswap()
+
+    # Split the flat literal array at each 0
+    clause_start = 0
+    literals = literals.tolist()
+    for end, lit in enumerate(literals):
+        if lit == 0:
+            cnf.clauses.append(literals[clause_start:end])
+            clause_start = end + 1
+    return cnf
+
+
+def save_knowledge_base(kb, filename):
+    """Writes the compiled clauses of a `KnowledgeBase` to a file."""
+    with open(filename, "wb") as f:
+        f.write(dump_cnf(kb.cnf))
+
+
+def load_knowledge_base(filename):
+    """Reads a `KnowledgeBase` saved with `save_knowledge_base`."""
+    with open(filename, "rb") as f:
+        return KnowledgeBase.from_cnf(load_cnf(f.read()))
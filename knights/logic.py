@@ -1,3 +1,4 @@
+import copy
 import itertools
 
 
@@ -34,7 +35,7 @@ class Sentence():
                         return False
                     count -= 1
             return count == 0
-        if not len(s) or s.isalpha() or (
+        if not len(s) or s.isalpha() or s in ("⊤", "⊥") or (
             s[0] == "(" and s[-1] == ")" and balanced(s[1:-1])
         ):
             return s
@@ -121,13 +122,18 @@ class And(Sentence):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
+        # The empty conjunction is true
+        if not self.conjuncts:
+            return "⊤"
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
@@ -152,13 +158,18 @@ class Or(Sentence):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
+        # The empty disjunction is false
+        if not self.disjuncts:
+            return "⊥"
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
@@ -211,22 +222,628 @@ class Biconditional(Sentence):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+class Interned():
+    """
+    Mixin for hash-consed sentences built by a `SentenceFactory`.
+
+    Interned sentences are shared between every formula that contains them,
+    so they cache their hash and symbols and must not be modified.
+    """
+
+    def __eq__(self, other):
+        return self is other or super().__eq__(other)
+
+    def __hash__(self):
+        return self._hash
+
+    def symbols(self):
+        return set(self._symbols)
+
+    def add(self, conjunct):
+        raise TypeError("interned sentences cannot be modified")
+
+    def __setstate__(self, state):
+
+        # String hashes differ between processes, so recompute after pickling
+        self.__dict__.update(state)
+        self._hash = super().__hash__()
+
+
+class InternedSymbol(Interned, Symbol):
+    pass
+
+
+class InternedNot(Interned, Not):
+    pass
+
+
+class InternedAnd(Interned, And):
+    pass
+
+
+class InternedOr(Interned, Or):
+    pass
+
+
+class InternedImplication(Interned, Implication):
+    pass
+
+
+class InternedBiconditional(Interned, Biconditional):
+    pass
+
+
+class SentenceFactory():
+    """
+    Builds hash-consed sentences: structurally equal sentences made by the
+    same factory are the same object, so shared subformulas are stored
+    and evaluated once.
+    """
+
+    def __init__(self):
+
+        # Interned sentences, keyed by their type and the ids of their parts
+        self.table = dict()
+        self.interned = set()
+
+    def make(self, cls, key, *parts):
+        """Returns the interned sentence for `key`, creating it if needed."""
+        if key in self.table:
+            return self.table[key]
+        sentence = cls(*parts)
+
+        # Hash and symbols match those of an equal, non-interned sentence
+        sentence._hash = super(Interned, sentence).__hash__()
+        sentence._symbols = frozenset(super(Interned, sentence).symbols())
+
+        self.table[key] = sentence
+        self.interned.add(id(sentence))
+        return sentence
+
+    def symbol(self, name):
+        return self.make(InternedSymbol, ("symbol", name), name)
+
+    def negation(self, operand):
+        operand = self.intern(operand)
+        return self.make(InternedNot, ("not", id(operand)), operand)
+
+    def conjunction(self, *conjuncts):
+        conjuncts = [self.intern(conjunct) for conjunct in conjuncts]
+        key = ("and", tuple(id(conjunct) for conjunct in conjuncts))
+        return self.make(InternedAnd, key, *conjuncts)
+
+    def disjunction(self, *disjuncts):
+        disjuncts = [self.intern(disjunct) for disjunct in disjuncts]
+        key = ("or", tuple(id(disjunct) for disjunct in disjuncts))
+        return self.make(InternedOr, key, *disjuncts)
+
+    def implication(self, antecedent, consequent):
+        antecedent = self.intern(antecedent)
+        consequent = self.intern(consequent)
+        key = ("implies", id(antecedent), id(consequent))
+        return self.make(InternedImplication, key, antecedent, consequent)
+
+    def biconditional(self, left, right):
+        left = self.intern(left)
+        right = self.intern(right)
+        key = ("biconditional", id(left), id(right))
+        return self.make(InternedBiconditional, key, left, right)
+
+    def intern(self, sentence):
+        """Returns the interned sentence equal to `sentence`."""
+        if id(sentence) in self.interned:
+            return sentence
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        elif isinstance(sentence, Not):
+            return self.negation(sentence.operand)
+        elif isinstance(sentence, And):
+            return self.conjunction(*sentence.conjuncts)
+        elif isinstance(sentence, Or):
+            return self.disjunction(*sentence.disjuncts)
+        elif isinstance(sentence, Implication):
+            return self.implication(sentence.antecedent, sentence.consequent)
+        elif isinstance(sentence, Biconditional):
+            return self.biconditional(sentence.left, sentence.right)
+        Sentence.validate(sentence)
+        raise TypeError(f"cannot intern {sentence!r}")
+
+
+# Factory shared by all callers of `hashcons`
+sentence_factory = SentenceFactory()
+
+
+def hashcons(sentence):
+    """Returns a hash-consed copy of `sentence` from the shared factory."""
+    return sentence_factory.intern(sentence)
+
+
+def negate(sentence):
+    """Returns the negation of a sentence, removing a double negation."""
+    if isinstance(sentence, bool):
+        return not sentence
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def reduce(sentence, assignment):
+    """
+    Returns `sentence` with the symbols in `assignment` replaced by their
+    values, nested conjunctions and disjunctions flattened, duplicates
+    removed and constants folded. Returns True or False if the sentence
+    reduces to a constant.
+    """
+    if isinstance(sentence, Symbol):
+        return assignment.get(sentence.name, sentence)
+
+    if isinstance(sentence, Not):
+        return negate(reduce(sentence.operand, assignment))
+
+    if isinstance(sentence, (And, Or)):
+        conjunction = isinstance(sentence, And)
+        cls = And if conjunction else Or
+        parts = sentence.conjuncts if conjunction else sentence.disjuncts
+
+        # Identity is True for a conjunction and False for a disjunction
+        operands = dict()
+        pending = [reduce(part, assignment) for part in reversed(parts)]
+        while pending:
+            part = pending.pop()
+            if isinstance(part, bool):
+                if part != conjunction:
+                    return part
+            elif isinstance(part, cls):
+                pending.extend(reversed(
+                    part.conjuncts if conjunction else part.disjuncts
+                ))
+            elif negate(part) in operands:
+                return not conjunction
+            else:
+                operands[part] = None
+
+        if not operands:
+            return conjunction
+        if len(operands) == 1:
+            return next(iter(operands))
+        return cls(*operands)
+
+    if isinstance(sentence, Implication):
+        antecedent = reduce(sentence.antecedent, assignment)
+        consequent = reduce(sentence.consequent, assignment)
+        if antecedent is False or consequent is True:
+            return True
+        if antecedent is True:
+            return consequent
+        if consequent is False:
+            return negate(antecedent)
+        if antecedent == consequent:
+            return True
+        return Implication(antecedent, consequent)
+
+    if isinstance(sentence, Biconditional):
+        left = reduce(sentence.left, assignment)
+        right = reduce(sentence.right, assignment)
+        if isinstance(left, bool) and isinstance(right, bool):
+            return left == right
+        if isinstance(left, bool):
+            return right if left else negate(right)
+        if isinstance(right, bool):
+            return left if right else negate(left)
+        if left == right:
+            return True
+        if left == negate(right):
+            return False
+        return Biconditional(left, right)
+
+    raise TypeError(f"cannot simplify {sentence!r}")
+
+
+def conjuncts(sentence):
+    """Returns the top-level conjuncts of a sentence, flattening nesting."""
+    if isinstance(sentence, And):
+        return [part for conjunct in sentence.conjuncts
+                for part in conjuncts(conjunct)]
+    return [sentence]
+
+
+def polarities(sentence, positive=True, found=None):
+    """
+    Returns a dictionary mapping each symbol name in `sentence` to the set
+    of polarities (True for positive, False for negative) it occurs with.
+    """
+    if found is None:
+        found = dict()
+    if isinstance(sentence, Symbol):
+        found.setdefault(sentence.name, set()).add(positive)
+    elif isinstance(sentence, Not):
+        polarities(sentence.operand, not positive, found)
+    elif isinstance(sentence, And):
+        for conjunct in sentence.conjuncts:
+            polarities(conjunct, positive, found)
+    elif isinstance(sentence, Or):
+        for disjunct in sentence.disjuncts:
+            polarities(disjunct, positive, found)
+    elif isinstance(sentence, Implication):
+        polarities(sentence.antecedent, not positive, found)
+        polarities(sentence.consequent, positive, found)
+    elif isinstance(sentence, Biconditional):
+
+        # Both sides occur with both polarities, so there is no need to
+        # walk them twice
+        for name in sentence.symbols():
+            found.setdefault(name, set()).update((True, False))
+    return found
+
+
+class Simplification():
+    """
+    Result of simplifying a knowledge base.
+
+    The knowledge base is equivalent to the conjunction of `sentence` and
+    the literals in `units`. Symbols in `pure` were fixed by pure literal
+    elimination, which keeps satisfiability but not equivalence, so it is
+    only applied to symbols the caller does not ask about.
+    """
+
+    def __init__(self, original, sentence, units, pure):
+        self.sentence = sentence
+        self.units = units
+        self.pure = pure
+
+        self.symbols_before = len(original.symbols())
+        self.symbols_after = len(sentence.symbols())
+        self.clauses_before = len(conjuncts(original))
+        self.clauses_after = (
+            0 if isinstance(sentence, And) and not sentence.conjuncts
+            else len(conjuncts(sentence))
+        )
+
+    @property
+    def symbols_removed(self):
+        return self.symbols_before - self.symbols_after
+
+    @property
+    def clauses_removed(self):
+        return self.clauses_before - self.clauses_after
+
+    def apply(self, sentence):
+        """
+        Returns `sentence` with the symbols fixed by unit propagation
+        replaced by their values.
+        """
+        return constant_sentence(reduce(sentence, self.units))
+
+    def __str__(self):
+        return (f"removed {self.symbols_removed} of {self.symbols_before} "
+                f"symbols and {self.clauses_removed} of "
+                f"{self.clauses_before} clauses")
+
+
+def constant_sentence(sentence):
+    """Turns True and False into the empty And and Or sentences."""
+    if sentence is True:
+        return And()
+    if sentence is False:
+        return Or()
+    return sentence
+
+
+def simplify(knowledge, keep=()):
+    """
+    Simplifies a knowledge base by flattening, constant folding, unit
+    propagation and pure literal elimination. Symbols named in `keep` are
+    never fixed by pure literal elimination.
+
+    Returns a `Simplification`. An unsatisfiable knowledge base simplifies
+    to the empty Or sentence.
+    """
+    keep = set(keep)
+    units = dict()
+    pure = dict()
+
+    # Each pass only substitutes the symbols it newly fixed into the
+    # sentence reduced so far
+    found = dict()
+    sentence = knowledge
+    while True:
+        sentence = reduce(sentence, found)
+        if isinstance(sentence, bool):
+            break
+
+        # Top-level literals fix the value of their symbol
+        found = dict()
+        for conjunct in conjuncts(sentence):
+            if isinstance(conjunct, Symbol):
+                found[conjunct.name] = True
+            elif (isinstance(conjunct, Not)
+                    and isinstance(conjunct.operand, Symbol)):
+                found[conjunct.operand.name] = False
+        if found:
+            units.update(found)
+            continue
+
+        # Symbols occurring with a single polarity can be set to satisfy it
+        found = {
+            name: positive.pop()
+            for name, positive in polarities(sentence).items()
+            if len(positive) == 1 and name not in keep
+        }
+        if not found:
+            break
+        pure.update(found)
+
+    return Simplification(
+        knowledge, constant_sentence(sentence), units, pure
+    )
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Compiles a logical sentence into a function of one integer, in which
+    bit i holds the truth value of the symbol named `symbols[i]`.
+
+    Every distinct subsentence becomes one line of straight-line Python
+    code, so evaluation takes a single pass with no recursion or lookups.
+    """
+    index = {name: i for i, name in enumerate(symbols)}
+    lines = []
+    names = dict()
+
+    def emit(sentence):
+        """Returns an expression for `sentence`, emitting lines as needed."""
+        if isinstance(sentence, Symbol):
+            try:
+                return f"(m >> {index[sentence.name]} & 1)"
+            except KeyError:
+                raise Exception(f"variable {sentence.name} not in model")
+        if id(sentence) in names:
+            return names[id(sentence)][1]
+
+        if isinstance(sentence, Not):
+            expression = f"not {emit(sentence.operand)}"
+        elif isinstance(sentence, And):
+            operands = [emit(conjunct) for conjunct in sentence.conjuncts]
+            expression = " and ".join(operands) or "True"
+        elif isinstance(sentence, Or):
+            operands = [emit(disjunct) for disjunct in sentence.disjuncts]
+            expression = " or ".join(operands) or "False"
+        elif isinstance(sentence, Implication):
+            antecedent = emit(sentence.antecedent)
+            consequent = emit(sentence.consequent)
+            expression = f"not {antecedent} or {consequent}"
+        elif isinstance(sentence, Biconditional):
+            left = emit(sentence.left)
+            right = emit(sentence.right)
+            expression = f"(not {left}) == (not {right})"
+        else:
+            raise TypeError(f"cannot compile {sentence!r}")
+
+        name = f"v{len(lines)}"
+        lines.append(f"    {name} = bool({expression})")
+        names[id(sentence)] = (sentence, name)
+        return name
+
+    result = emit(sentence)
+    source = "def evaluate(m):\n" + "".join(
+        line + "\n" for line in lines
+    ) + f"    return bool({result})\n"
+    namespace = dict()
+    exec(source, namespace)
+    return namespace["evaluate"]
+
+
+# Compiled sentences, keyed by a private copy of the sentence and symbols
+compiled_sentences = dict()
+
+
+def compiled(sentence, symbols):
+    """
+    Returns `compile_sentence(sentence, symbols)`, reusing the function
+    compiled earlier for an equal sentence over the same symbols.
+    """
+    key = (sentence, tuple(symbols))
+    if key not in compiled_sentences:
+        if len(compiled_sentences) >= 1024:
+            compiled_sentences.clear()
+        compiled_sentences[copy.deepcopy(key)] = compile_sentence(
+            sentence, symbols
+        )
+    return compiled_sentences[key]
+
+
+def symbol_patterns(count, chunk_bits):
+    """
+    Returns bit vectors over a chunk of 2^`chunk_bits` models for the first
+    `count` symbols: bit k of vector i is bit i of model number k.
+    """
+    width = 1 << chunk_bits
+    patterns = []
+    for i in range(min(count, chunk_bits)):
+
+        # Runs of 2^i false models then 2^i true models, doubled up to width
+        run = 1 << i
+        pattern = ((1 << run) - 1) << run
+        size = 2 * run
+        while size < width:
+            pattern |= pattern << size
+            size *= 2
+        patterns.append(pattern)
+    return patterns
+
+
+def bit_vectors(sentences, vectors, mask):
+    """
+    Evaluates logical sentences on many models at once.
+
+    `vectors` maps each symbol name to an integer whose bits are its truth
+    values in successive models, and `mask` has a bit set for every model.
+    Returns an integer of the same kind for each sentence.
+    """
+    memo = dict()
+
+    def evaluate(sentence):
+        if isinstance(sentence, Symbol):
+            try:
+                return vectors[sentence.name]
+            except KeyError:
+                raise Exception(f"variable {sentence.name} not in model")
+        if id(sentence) in memo:
+            return memo[id(sentence)][1]
+
+        if isinstance(sentence, Not):
+            value = mask ^ evaluate(sentence.operand)
+        elif isinstance(sentence, And):
+            value = mask
+            for conjunct in sentence.conjuncts:
+                value &= evaluate(conjunct)
+        elif isinstance(sentence, Or):
+            value = 0
+            for disjunct in sentence.disjuncts:
+                value |= evaluate(disjunct)
+        elif isinstance(sentence, Implication):
+            value = ((mask ^ evaluate(sentence.antecedent))
+                     | evaluate(sentence.consequent))
+        elif isinstance(sentence, Biconditional):
+            value = mask ^ (evaluate(sentence.left) ^ evaluate(sentence.right))
+        else:
+            raise TypeError(f"cannot evaluate {sentence!r}")
+
+        memo[id(sentence)] = (sentence, value)
+        return value
+
+    return [evaluate(sentence) for sentence in sentences]
+
+
+def truth_table_entailment(knowledge, queries, symbols, chunk_bits=16):
+    """
+    Returns, for each query, whether knowledge base entails it, evaluating
+    every sentence on whole blocks of models at once with integers as bit
+    vectors.
+
+    Models are processed 2^`chunk_bits` at a time to bound memory. Within a
+    chunk, the first `chunk_bits` symbols vary and the rest are constant.
+    """
+    entailed = [True for _ in queries]
+    chunk_bits = min(chunk_bits, len(symbols))
+    mask = (1 << (1 << chunk_bits)) - 1
+    patterns = symbol_patterns(len(symbols), chunk_bits)
+
+    for chunk in range(2 ** (len(symbols) - chunk_bits)):
+        vectors = dict()
+        for i, name in enumerate(symbols):
+            if i < chunk_bits:
+                vectors[name] = patterns[i]
+            else:
+                vectors[name] = mask if chunk >> (i - chunk_bits) & 1 else 0
+        kb, *values = bit_vectors([knowledge] + list(queries), vectors, mask)
+
+        # A model where knowledge is true but the query is false
+        for i, q in enumerate(values):
+            if entailed[i] and kb & ~q:
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def enumeration_entailment(knowledge, queries, symbols):
+    """
+    Returns, for each query, whether knowledge base entails it, evaluating
+    compiled sentences on each model in turn.
+    """
+    knowledge = compiled(knowledge, symbols)
+    queries = [compiled(query, symbols) for query in queries]
+    entailed = [True for _ in queries]
+
+    # Each integer below 2^n encodes one model as a bitmask
+    for model in range(2 ** len(symbols)):
+
+        # If knowledge base is true in model, then queries must also be true
+        if knowledge(model):
+            for i, query in enumerate(queries):
+                if entailed[i] and not query(model):
+                    entailed[i] = False
+            if not any(entailed):
+                break
+    return entailed
+
+
+# Largest number of symbols checked by truth table rather than a SAT solver
+TRUTH_TABLE_LIMIT = 25
+
+# Fewest symbols for which simplifying first is worth its cost by default
+PREPROCESS_LIMIT = 12
+
+
+def query_many(knowledge, queries, strategy=None, preprocess=None):
+    """
+    Returns a list saying, for each query, whether knowledge base entails it.
+    The knowledge base is enumerated or solved once for all queries.
+
+    `strategy` is one of "truth_table", "enumeration" or "sat". By default,
+    the truth table is used for up to `TRUTH_TABLE_LIMIT` symbols and the
+    SAT solver beyond that. If `preprocess` is true, the knowledge base is
+    first simplified and the symbols it fixes are removed from the queries.
+    By default, only knowledge bases of at least `PREPROCESS_LIMIT` symbols
+    are simplified.
+    """
+    queries = list(queries)
+
+    if preprocess is None:
+        preprocess = len(knowledge.symbols()) >= PREPROCESS_LIMIT
+    if preprocess:
+        simplification = simplify(knowledge, keep=set().union(
+            *[query.symbols() for query in queries]
+        ))
+        knowledge = simplification.sentence
+        queries = [simplification.apply(query) for query in queries]
+
+    # Get all symbols in both knowledge and queries
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+
+    if strategy is None:
+        if len(symbols) <= TRUTH_TABLE_LIMIT:
+            strategy = "truth_table"
+        else:
+            strategy = "sat"
+
+    if strategy == "truth_table":
+        return truth_table_entailment(knowledge, queries, symbols)
+    elif strategy == "enumeration":
+        return enumeration_entailment(knowledge, queries, symbols)
+    elif strategy == "sat":
+        import sat
+        return sat.query_many(knowledge, queries)
+    raise ValueError(f"unknown strategy {strategy!r}")
+
+
+def model_check(knowledge, query, strategy=None, preprocess=None):
+    """
+    Checks if knowledge base entails query, using `strategy` and
+    `preprocess` as described in `query_many`.
+    """
+    return query_many(knowledge, [query], strategy, preprocess)[0]
+
+
+def recursive_model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by recursively building a
+    dictionary for every model.
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
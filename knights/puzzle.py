@@ -1,4 +1,6 @@
 from bdb import checkfuncname
+from concurrent.futures import ProcessPoolExecutor
+
 from logic import *
 
 AKnight = Symbol("A is a Knight")
@@ -68,22 +70,49 @@ knowledge3 = And(
 )
 
 
+def solve(puzzle):
+    """
+    Returns the symbols entailed by a puzzle, given as a pair of its
+    knowledge base and the symbols to ask about.
+    """
+    knowledge, symbols = puzzle
+    entailed = query_many(knowledge, symbols)
+    return [symbol for symbol, holds in zip(symbols, entailed) if holds]
+
+
+def solve_all(knowledge_bases, symbols):
+    """
+    Returns, for each knowledge base, the list of symbols it entails.
+    Knowledge bases are solved in parallel across processes.
+    """
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(
+            solve, [(knowledge, symbols) for knowledge in knowledge_bases]
+        ))
+
+
 def main():
     symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+
+    # Repeated subformulas such as Or(AKnight, AKnave) share a single node
     puzzles = [
-        ("Puzzle 0", knowledge0),
-        ("Puzzle 1", knowledge1),
-        ("Puzzle 2", knowledge2),
-        ("Puzzle 3", knowledge3)
+        ("Puzzle 0", hashcons(knowledge0)),
+        ("Puzzle 1", hashcons(knowledge1)),
+        ("Puzzle 2", hashcons(knowledge2)),
+        ("Puzzle 3", hashcons(knowledge3))
     ]
+    implemented = [
+        knowledge for _, knowledge in puzzles if len(knowledge.conjuncts) > 0
+    ]
+    solutions = iter(solve_all(implemented, symbols))
+
     for puzzle, knowledge in puzzles:
         print(puzzle)
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
-                    print(f"    {symbol}")
+            for symbol in next(solutions):
+                print(f"    {symbol}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,551 @@
+import heapq
+
+from logic import *
+
+
+class CNF():
+    """
+    Conjunctive normal form of logical sentences, built with the Tseitin
+    transformation.
+
+    Variables are numbered from 1 and literals are nonzero integers, negative
+    for negated variables, as in the DIMACS format. Every compound
+    subsentence gets a fresh variable defined to be equivalent to it, so the
+    number of clauses stays linear in the size of the sentence.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+
+        # Variable number of each symbol name, and name of each variable
+        self.variables = dict()
+        self.names = dict()
+
+        # Literals of subsentences already encoded, keyed by object identity
+        self.encoded = dict()
+        self.true = None
+
+    def new_variable(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def variable(self, name):
+        """Returns the variable number for a symbol name."""
+        if name not in self.variables:
+            var = self.new_variable()
+            self.variables[name] = var
+            self.names[var] = name
+        return self.variables[name]
+
+    def constant(self, value):
+        """Returns a literal that is always `value`."""
+        if self.true is None:
+            self.true = self.new_variable()
+            self.clauses.append([self.true])
+        return self.true if value else -self.true
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses that
+        define any new variables.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        key = id(sentence)
+        if key in self.encoded:
+            return self.encoded[key][1]
+
+        if isinstance(sentence, And):
+            lit = self.gate([self.literal(c) for c in sentence.conjuncts], 1)
+        elif isinstance(sentence, Or):
+            lit = self.gate([self.literal(d) for d in sentence.disjuncts], -1)
+        elif isinstance(sentence, Implication):
+            lit = self.gate([-self.literal(sentence.antecedent),
+                             self.literal(sentence.consequent)], -1)
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            lit = self.new_variable()
+            self.clauses.extend([
+                [-lit, -a, b], [-lit, a, -b], [lit, a, b], [lit, -a, -b]
+            ])
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+
+        # Keep the sentence alive so its id cannot be reused
+        self.encoded[key] = (sentence, lit)
+        return lit
+
+    def gate(self, operands, sign):
+        """
+        Defines a variable equivalent to the conjunction (`sign` 1) or
+        disjunction (`sign` -1) of `operands` and returns its literal.
+        """
+        if not operands:
+            return self.constant(sign == 1)
+        if len(operands) == 1:
+            return operands[0]
+
+        # A disjunction is the negation of a conjunction of negations
+        operands = [sign * op for op in operands]
+        lit = self.new_variable()
+        for op in operands:
+            self.clauses.append([-lit, op])
+        self.clauses.append([lit] + [-op for op in operands])
+        return sign * lit
+
+    def add(self, sentence):
+        """Asserts that `sentence` is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+def luby(i):
+    """Returns the `i`th element (from 0) of the Luby restart sequence."""
+    size, exponent = 1, 0
+    while size < i + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        exponent -= 1
+        i = i % size
+    return 2 ** exponent
+
+
+class Solver():
+    """
+    CDCL satisfiability solver over clauses of integer literals.
+
+    Uses two watched literals per clause for unit propagation, first-UIP
+    clause learning with non-chronological backjumping, activity-based
+    branching with phase saving, and Luby restarts. Clauses may be added
+    between calls to `solve`, and learned clauses are kept across calls.
+    """
+
+    def __init__(self, clauses=(), num_vars=0):
+        self.num_vars = 0
+        self.clauses = []
+        self.learnts = []
+        self.ok = True
+        self.model = None
+
+        # Per variable state, indexed by variable number
+        self.values = [0]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+
+        # Clauses watching each literal, indexed by `watch_index`
+        self.watches = [[], []]
+
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.heap = []
+        self.var_inc = 1.0
+
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+        self.ensure_vars(num_vars)
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def ensure_vars(self, n):
+        """Makes sure variables 1 to `n` exist."""
+        while self.num_vars < n:
+            self.num_vars += 1
+            self.values.append(0)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            self.watches.extend([[], []])
+            heapq.heappush(self.heap, (0.0, self.num_vars))
+
+    @staticmethod
+    def watch_index(lit):
+        return 2 * lit if lit > 0 else -2 * lit + 1
+
+    def value(self, lit):
+        """Returns 1 if `lit` is true, -1 if false and 0 if unassigned."""
+        value = self.values[abs(lit)]
+        return value if lit > 0 else -value
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def add_clause(self, clause):
+        """
+        Adds a clause to the solver. Returns False if the clauses are now
+        known to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        self.ensure_vars(max((abs(lit) for lit in clause), default=0))
+
+        # Drop false literals and skip tautologies or satisfied clauses
+        lits = []
+        for lit in clause:
+            value = self.value(lit)
+            if value == 1 or -lit in lits:
+                return True
+            if value == 0 and lit not in lits:
+                lits.append(lit)
+
+        if not lits:
+            self.ok = False
+        elif len(lits) == 1:
+            self.enqueue(lits[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(lits)
+            self.clauses.append(lits)
+        return self.ok
+
+    def attach(self, clause):
+        self.watches[self.watch_index(-clause[0])].append(clause)
+        self.watches[self.watch_index(-clause[1])].append(clause)
+
+    def enqueue(self, lit, reason):
+        var = abs(lit)
+        self.values[var] = 1 if lit > 0 else -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """
+        Propagates all enqueued assignments. Returns a conflicting clause,
+        or None if there is no conflict.
+        """
+        values = self.values
+        while self.qhead < len(self.trail):
+            p = self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            false_lit = -p
+
+            # Clauses watching the literal that just became false
+            watchers = self.watches[self.watch_index(p)]
+            kept = []
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+
+                # Clause already satisfied by the other watch
+                first = clause[0]
+                if (values[first] if first > 0 else -values[abs(first)]) == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for a new literal to watch
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if (values[lit] if lit > 0 else -values[-lit]) != -1:
+                        clause[1], clause[k] = lit, false_lit
+                        self.watches[self.watch_index(-lit)].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if (values[first] if first > 0
+                            else -values[-first]) == -1:
+                        kept.extend(watchers[i:])
+                        self.watches[self.watch_index(p)] = kept
+                        self.qhead = len(self.trail)
+                        return clause
+                    self.enqueue(first, clause)
+
+            self.watches[self.watch_index(p)] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Derives a learned clause from a conflict using the first unique
+        implication point. Returns the clause, asserting literal first,
+        and the level to backjump to.
+        """
+        seen = set()
+        learnt = [None]
+        counter = 0
+        p = None
+        index = len(self.trail) - 1
+        clause = conflict
+        current = self.decision_level()
+
+        while True:
+            for q in (clause if p is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.level[var] >= current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+
+            # Walk back along the trail to the next marked literal
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            p = self.trail[index]
+            index -= 1
+            clause = self.reason[abs(p)]
+            counter -= 1
+            if counter == 0:
+                break
+
+        learnt[0] = -p
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Watch the literal from the highest remaining level second
+        highest = max(range(1, len(learnt)),
+                      key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.num_vars + 1)
+                         if self.values[v] == 0]
+            heapq.heapify(self.heap)
+
+    def cancel_until(self, level):
+        """Undoes all assignments made above decision level `level`."""
+        if self.decision_level() <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in reversed(self.trail[start:]):
+            var = abs(lit)
+            self.phase[var] = lit > 0
+            self.values[var] = 0
+            self.reason[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick_branch(self):
+        """Returns the next decision literal, or None if all are assigned."""
+        while self.heap:
+            _, var = heapq.heappop(self.heap)
+            if self.values[var] == 0:
+                return var if self.phase[var] else -var
+        return None
+
+    def search(self, conflict_limit, assumptions):
+        """
+        Searches until a model is found (True), unsatisfiability is proven
+        (False), or `conflict_limit` conflicts happen (None).
+        """
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+
+                learnt, level = self.analyze(conflict)
+                self.cancel_until(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.attach(learnt)
+                    self.learnts.append(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.var_inc /= 0.95
+                continue
+
+            if conflicts >= conflict_limit:
+                self.cancel_until(0)
+                return None
+
+            # Assumptions are decided first, one per decision level
+            decision = None
+            while self.decision_level() < len(assumptions):
+                lit = assumptions[self.decision_level()]
+                value = self.value(lit)
+                if value == 1:
+                    self.trail_lim.append(len(self.trail))
+                elif value == -1:
+                    return False
+                else:
+                    decision = lit
+                    break
+
+            if decision is None:
+                decision = self.pick_branch()
+                if decision is None:
+                    self.model = [value > 0 for value in self.values]
+                    return True
+
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(decision, None)
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal in
+        `assumptions` true, False otherwise. When satisfiable, `self.model`
+        holds the value of each variable, indexed by variable number.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        assumptions = list(assumptions)
+        self.ensure_vars(max((abs(lit) for lit in assumptions), default=0))
+        self.cancel_until(0)
+
+        restarts = 0
+        status = None
+        while status is None:
+            status = self.search(100 * luby(restarts), assumptions)
+            restarts += 1
+        self.cancel_until(0)
+        return status
+
+
+class KnowledgeBase():
+    """
+    Knowledge base backed by a persistent SAT solver.
+
+    Sentences added with `add` are encoded into the same solver, which keeps
+    its clauses and everything it has learned between queries. Queries may
+    hold under temporary assumptions, which are passed to the solver rather
+    than added as clauses, so nothing needs to be encoded again.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = Solver()
+
+        # Number of clauses of `cnf` already given to the solver
+        self.fed = 0
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    @classmethod
+    def from_cnf(cls, cnf):
+        """Returns a knowledge base holding the clauses of an existing CNF."""
+        kb = cls()
+        kb.cnf = cnf
+        kb.flush()
+        return kb
+
+    def flush(self):
+        """Gives the solver any clauses encoded since the last call."""
+        self.solver.ensure_vars(self.cnf.num_vars)
+        for clause in self.cnf.clauses[self.fed:]:
+            self.solver.add_clause(clause)
+        self.fed = len(self.cnf.clauses)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.cnf.add(sentence)
+        self.flush()
+
+    def literals(self, sentences):
+        """Returns literals for sentences, encoding them if needed."""
+        literals = [self.cnf.literal(sentence) for sentence in sentences]
+        self.flush()
+        return literals
+
+    def satisfiable(self, assumptions=()):
+        """
+        Returns True if the knowledge base is consistent with every sentence
+        in `assumptions`. When it is, `self.solver.model` holds a model.
+        """
+        return self.solver.solve(self.literals(assumptions))
+
+    def entails(self, query, assumptions=()):
+        """
+        Checks if the knowledge base, together with the sentences in
+        `assumptions`, entails query.
+        """
+        literals = self.literals(list(assumptions) + [query])
+        return not self.solver.solve(literals[:-1] + [-literals[-1]])
+
+    def query_many(self, queries, assumptions=()):
+        """
+        Returns a list saying, for each query, whether the knowledge base
+        and `assumptions` entail it.
+
+        Entailed queries form part of the backbone of the knowledge base:
+        they hold in every model. Each model the solver finds rules out
+        every query false in it, so most queries never need a solver call
+        of their own.
+        """
+        literals = self.literals(queries)
+        assumed = self.literals(assumptions)
+
+        # An inconsistent knowledge base entails everything
+        if not self.solver.solve(assumed):
+            return [True for _ in queries]
+
+        def holds(lit, model):
+            return model[abs(lit)] == (lit > 0)
+
+        entailed = [None for _ in queries]
+        model = self.solver.model
+        for i, lit in enumerate(literals):
+            if entailed[i] is not None:
+                continue
+            if not holds(lit, model):
+                entailed[i] = False
+                continue
+
+            # Look for a model in which this query is false
+            if self.solver.solve(assumed + [-lit]):
+                model = self.solver.model
+                entailed[i] = False
+                for j in range(i + 1, len(literals)):
+                    if entailed[j] is None and not holds(literals[j], model):
+                        entailed[j] = False
+            else:
+                entailed[i] = True
+        return entailed
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by showing that the knowledge
+    base together with the negation of the query is unsatisfiable.
+    """
+    return KnowledgeBase(knowledge).entails(query)
+
+
+def query_many(knowledge, queries):
+    """
+    Returns a list saying, for each query, whether knowledge base entails it.
+    """
+    return KnowledgeBase(knowledge).query_many(queries)
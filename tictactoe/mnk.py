@@ -0,0 +1,381 @@
+"""
+m,n,k Game Player
+
+Plays k-in-a-row on a board of m rows and n columns, such as tic-tac-toe
+(3, 3, 3) or gomoku (15, 15, 5), with a time-limited search.
+"""
+
+import math
+import random
+import time
+
+from tictactoe import X, O, EMPTY
+
+
+# Score of a win, less the number of moves taken to reach it
+WIN = 1000000
+
+# Deepest search ever attempted, so that win scores stay above any other
+MAX_PLY = 1000
+
+# Directions of lines: across, down and the two diagonals
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+# Cell contents
+NOBODY = 0
+PLAYERS = {X: 1, O: 2}
+
+# Bounds stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TimeUp(Exception):
+    """Raised when a search runs out of time."""
+    pass
+
+
+class Board():
+    """
+    An m,n,k board that tracks, as moves are played and undone, a Zobrist
+    hash of the position, the number of each player's stones in every
+    window of k cells in a row, and a heuristic score derived from those
+    counts. A move wins if it completes a window, so only the windows
+    through the last move are ever checked.
+    """
+
+    def __init__(self, m, n, k, radius=2, seed=0):
+        """
+        Create an empty board. Moves are only considered within `radius`
+        cells of a stone already played; `seed` fixes the Zobrist keys.
+        """
+        if k > max(m, n):
+            raise ValueError("k is longer than any line on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.cells = [NOBODY] * (m * n)
+        self.to_move = PLAYERS[X]
+        self.moves = []
+        self.winner = None
+
+        # Every window of k cells in a line, and the windows through each cell
+        self.windows = []
+        self.cell_windows = [[] for _ in self.cells]
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        window = [
+                            (i + di * d) * n + j + dj * d for d in range(k)
+                        ]
+                        for cell in window:
+                            self.cell_windows[cell].append(len(self.windows))
+                        self.windows.append(window)
+        self.counts = {
+            player: [0] * len(self.windows) for player in PLAYERS.values()
+        }
+
+        # Worth of a window with some stones of only one player, growing
+        # steeply with the number of stones
+        self.worth = [0] + [4 ** count for count in range(1, k + 1)]
+        self.score = 0
+
+        # Cells close enough to each cell to be worth playing after it
+        self.nearby = [
+            [
+                a * n + b
+                for a in range(max(0, i - radius), min(m, i + radius + 1))
+                for b in range(max(0, j - radius), min(n, j + radius + 1))
+                if (a, b) != (i, j)
+            ]
+            for i in range(m)
+            for j in range(n)
+        ]
+
+        # Zobrist keys for each player's stone on each cell, and for the
+        # side to move
+        rng = random.Random(seed)
+        self.keys = {
+            player: [rng.getrandbits(64) for _ in self.cells]
+            for player in PLAYERS.values()
+        }
+        self.side_key = rng.getrandbits(64)
+        self.hash = 0
+
+    @classmethod
+    def from_rows(cls, rows, k, **options):
+        """
+        Create a board from a list of rows of X, O and EMPTY, as used by
+        `tictactoe`, playing the stones in alternating order.
+        """
+        board = cls(len(rows), len(rows[0]), k, **options)
+        stones = {X: [], O: []}
+        for i, row in enumerate(rows):
+            for j, cell in enumerate(row):
+                if cell != EMPTY:
+                    stones[cell].append(i * board.n + j)
+        if len(stones[O]) not in (len(stones[X]), len(stones[X]) - 1):
+            raise ValueError("players have not taken turns")
+        for turn in range(len(stones[X]) + len(stones[O])):
+            board.play(stones[X if turn % 2 == 0 else O][turn // 2])
+        return board
+
+    def rows(self):
+        """Return the board as a list of rows of X, O and EMPTY."""
+        names = {NOBODY: EMPTY, PLAYERS[X]: X, PLAYERS[O]: O}
+        return [
+            [names[self.cells[i * self.n + j]] for j in range(self.n)]
+            for i in range(self.m)
+        ]
+
+    def window_worth(self, window):
+        """Return how good a window is for X, negative if good for O."""
+        x = self.counts[PLAYERS[X]][window]
+        o = self.counts[PLAYERS[O]][window]
+        if o == 0:
+            return self.worth[x]
+        if x == 0:
+            return -self.worth[o]
+        return 0
+
+    def play(self, cell):
+        """Place a stone for the player to move on `cell`."""
+        player = self.to_move
+        counts = self.counts[player]
+        for window in self.cell_windows[cell]:
+            before = self.window_worth(window)
+            counts[window] += 1
+            self.score += self.window_worth(window) - before
+            if counts[window] == self.k:
+                self.winner = player
+        self.cells[cell] = player
+        self.hash ^= self.keys[player][cell] ^ self.side_key
+        self.moves.append(cell)
+        self.to_move = 3 - player
+
+    def undo(self):
+        """Take back the last move."""
+        cell = self.moves.pop()
+        player = 3 - self.to_move
+        counts = self.counts[player]
+        for window in self.cell_windows[cell]:
+            before = self.window_worth(window)
+            counts[window] -= 1
+            self.score += self.window_worth(window) - before
+        self.cells[cell] = NOBODY
+        self.hash ^= self.keys[player][cell] ^ self.side_key
+        self.to_move = player
+        self.winner = None
+
+    def full(self):
+        """Return True if every cell has a stone."""
+        return len(self.moves) == len(self.cells)
+
+    def evaluate(self):
+        """Return the heuristic score for the player to move."""
+        return self.score if self.to_move == PLAYERS[X] else -self.score
+
+    def candidates(self):
+        """
+        Return the empty cells near a stone, or the centre of an empty board.
+        """
+        if not self.moves:
+            return [(self.m // 2) * self.n + self.n // 2]
+        cells = set()
+        for stone in self.moves:
+            for cell in self.nearby[stone]:
+                if self.cells[cell] == NOBODY:
+                    cells.add(cell)
+        if not cells:
+            cells = {
+                cell for cell, stone in enumerate(self.cells)
+                if stone == NOBODY
+            }
+        return list(cells)
+
+
+class Engine():
+    """
+    Iterative-deepening alpha-beta search over a `Board`, with a
+    transposition table keyed by Zobrist hash, and moves ordered by the
+    table's best move, then killer moves, then the history heuristic.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.transpositions = dict()
+        self.history = [0] * len(board.cells)
+        self.killers = []
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None
+
+    def best_move(self, time_limit=1.0, max_depth=None):
+        """
+        Return the best move (i, j) found within `time_limit` seconds,
+        searching one move deeper each time, or None if the game is over.
+        """
+        board = self.board
+        if board.winner is not None or board.full():
+            return None
+        self.deadline = time.perf_counter() + time_limit
+        self.nodes = 0
+        remaining = len(board.cells) - len(board.moves)
+        if max_depth is None or max_depth > remaining:
+            max_depth = remaining
+
+        best = None
+        played = len(board.moves)
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self.search_root(depth)
+            except TimeUp:
+
+                # Take back the moves of the interrupted search
+                while len(board.moves) > played:
+                    board.undo()
+                break
+            best = move
+            self.depth = depth
+
+            # Nothing can change once a win or loss is certain
+            if abs(score) >= WIN - MAX_PLY:
+                break
+
+        if best is None:
+            best = self.ordered_moves(0, None)[0]
+        return divmod(best, board.n)
+
+    def search_root(self, depth):
+        """
+        Search every move to `depth` and return the best score and move.
+        """
+        alpha, beta = -math.inf, math.inf
+        best_score, best_move = -math.inf, None
+        entry = self.transpositions.get(self.board.hash)
+        for cell in self.ordered_moves(0, entry and entry[3]):
+            self.board.play(cell)
+            score = -self.negamax(depth - 1, -beta, -alpha, 1)
+            self.board.undo()
+            if score > best_score:
+                best_score, best_move = score, cell
+            alpha = max(alpha, score)
+        self.transpositions[self.board.hash] = (
+            depth, best_score, EXACT, best_move
+        )
+        return best_score, best_move
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Return the score of the board for the player to move, searching
+        `depth` more moves, or a bound on it outside of (alpha, beta).
+        """
+        self.nodes += 1
+        if self.nodes % 1024 == 0 and time.perf_counter() > self.deadline:
+            raise TimeUp()
+
+        board = self.board
+        if board.winner is not None:
+            return -(WIN - ply)
+        if board.full():
+            return 0
+        if depth == 0:
+            return board.evaluate()
+
+        # Probe the transposition table
+        key = board.hash
+        entry = self.transpositions.get(key)
+        table_move = None
+        if entry is not None:
+            stored_depth, stored, bound, table_move = entry
+            if stored_depth >= depth:
+                stored = from_table(stored, ply)
+                if bound == EXACT:
+                    return stored
+                if bound == LOWER:
+                    alpha = max(alpha, stored)
+                elif bound == UPPER:
+                    beta = min(beta, stored)
+                if alpha >= beta:
+                    return stored
+
+        original_alpha = alpha
+        best_score, best_move = -math.inf, None
+        for cell in self.ordered_moves(ply, table_move):
+            board.play(cell)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.undo()
+            if score > best_score:
+                best_score, best_move = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+
+                # Remember moves that cut off the search
+                killers = self.killers[ply]
+                if cell not in killers:
+                    killers.insert(0, cell)
+                    del killers[2:]
+                self.history[cell] += depth * depth
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[key] = (
+            depth, to_table(best_score, ply), bound, best_move
+        )
+        return best_score
+
+    def ordered_moves(self, ply, table_move):
+        """
+        Return the candidate moves: the transposition table's best move
+        first, then killer moves at this ply, then by history score.
+        """
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        moves = self.board.candidates()
+        moves.sort(key=self.history.__getitem__, reverse=True)
+
+        first = [table_move] if table_move is not None else []
+        first += [
+            cell for cell in self.killers[ply]
+            if cell != table_move and self.board.cells[cell] == NOBODY
+            and cell in moves
+        ]
+        return first + [cell for cell in moves if cell not in first]
+
+
+def to_table(score, ply):
+    """
+    Convert a win score counted from the root into one counted from the
+    current position, so it stays right wherever the position recurs.
+    """
+    if score >= WIN - MAX_PLY:
+        return score + ply
+    if score <= -(WIN - MAX_PLY):
+        return score - ply
+    return score
+
+
+def from_table(score, ply):
+    """Convert a win score stored by `to_table` back to the root."""
+    if score >= WIN - MAX_PLY:
+        return score - ply
+    if score <= -(WIN - MAX_PLY):
+        return score + ply
+    return score
+
+
+def best_move(rows, k, time_limit=1.0, **options):
+    """
+    Return the best move (i, j) for the player to move on a list of rows
+    of X, O and EMPTY, playing k in a row, found within `time_limit`
+    seconds.
+    """
+    return Engine(Board.from_rows(rows, k, **options)).best_move(time_limit)
@@ -2,15 +2,27 @@
 Tic Tac Toe Player
 """
 
-import copy
 import math
-import random
 
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Boards are searched as bitboards: a 9-bit mask of X's cells and one of
+# O's cells, where cell (i, j) is bit 3 * i + j
+FULL = 0b111111111
+
+# Masks of the three rows, three columns and two diagonals
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# Whether each 9-bit mask of one player's cells contains a line
+WINS = [any(mask & line == line for line in WIN_MASKS) for mask in range(512)]
+
 
 def initial_state():
     """
@@ -21,193 +33,281 @@ def initial_state():
             [EMPTY, EMPTY, EMPTY]]
 
 
-def player(board):
+def to_bitboard(board):
     """
-    Returns player who has the next turn on a board.
+    Returns the masks of X's cells and of O's cells on a board.
     """
-    xcount = ocount = 0
+    xs = os = 0
     for i in range(3):
         for j in range(3):
             if board[i][j] == X:
-                xcount += 1
+                xs |= 1 << (3 * i + j)
             elif board[i][j] == O:
-                ocount += 1
+                os |= 1 << (3 * i + j)
+    return xs, os
+
+
+def to_board(xs, os):
+    """
+    Returns the board with X's and O's on the cells in their masks.
+    """
+    return [
+        [
+            X if xs >> (3 * i + j) & 1 else O if os >> (3 * i + j) & 1
+            else EMPTY
+            for j in range(3)
+        ]
+        for i in range(3)
+    ]
+
+
+def bit_player(xs, os):
+    """
+    Returns player who has the next turn on a bitboard.
+    """
+    return O if xs.bit_count() > os.bit_count() else X
+
+
+def bit_result(xs, os, cell):
+    """
+    Returns the bitboard after the next player marks bit `cell`.
+    """
+    if xs.bit_count() > os.bit_count():
+        return xs, os | 1 << cell
+    return xs | 1 << cell, os
 
-    return O if xcount > ocount else X
-    
+
+def bit_winner(xs, os):
+    """
+    Returns the winner on a bitboard, if there is one.
+    """
+    if WINS[xs]:
+        return X
+    if WINS[os]:
+        return O
+    return None
+
+
+def bit_terminal(xs, os):
+    """
+    Returns True if the game on a bitboard is over, False otherwise.
+    """
+    return WINS[xs] or WINS[os] or xs | os == FULL
+
+
+def bit_utility(xs, os):
+    """
+    Returns 1 if X has won on a bitboard, -1 if O has won, 0 otherwise.
+    """
+    if WINS[xs]:
+        return 1
+    if WINS[os]:
+        return -1
+    return 0
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return bit_player(*to_bitboard(board))
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    freeSquares = set()
-    
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == EMPTY:
-                freeSquares.add((i, j))
-    return freeSquares
+    xs, os = to_bitboard(board)
+    free = FULL & ~(xs | os)
+    return {divmod(cell, 3) for cell in range(9) if free >> cell & 1}
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    # if board[action[0]][action[1]] != EMPTY:
-    #     raise Exception("illegal move.")
-    
-    new_board = copy.deepcopy(board)
-    new_board[action[0]][action[1]] = player(board)
-    return new_board
+    xs, os = to_bitboard(board)
+    return to_board(*bit_result(xs, os, 3 * action[0] + action[1]))
+
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    tem_board = copy.deepcopy(board)
-    #converting every X to True and every O to False for easier representation
-    for i in range(3):
-        for j in range(3):
-            if tem_board[i][j] == X:
-                tem_board[i][j] = True
-            elif tem_board[i][j] == O:
-                tem_board[i][j] = False
-
-    #winning positions
-    diagonals = ([tem_board[0][0], tem_board[1][1], tem_board[2][2]], [tem_board[0][2], tem_board[1][1], tem_board[2][0]])
-    rows = (tem_board[0], tem_board[1], tem_board[2])
-    columns = ([rows[0][0], rows[1][0], rows[2][0]], [rows[0][1], rows[1][1], rows[2][1]], [rows[0][2], rows[1][2], rows[2][2]])
-
-    #checking for a win in the diagonals
-    for i in range(len(diagonals)):
-        if all(diagonals[i]):
-            return X
-        elif not any(diagonals[i]) and EMPTY not in diagonals[i]:
-            return O
-
-    #checking for a win in the rows
-    for i in range(len(rows)):
-        if all(rows[i]):
-            return X
-        elif not any(rows[i]) and EMPTY not in rows[i]:
-            return O
-
-    #checking for a win in the columns
-    for i in range(len(columns)):
-        if all(columns[i]):
-            return X
-        elif not any(columns[i]) and EMPTY not in columns[i]:
-            return O
-
-    #if there is no win return none
-    return None
+    return bit_winner(*to_bitboard(board))
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    #return True if there is a winner
-    if winner(board) == X or winner(board) == O:
-        return True
+    return bit_terminal(*to_bitboard(board))
 
-    #return False if there is any available square
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return bit_utility(*to_bitboard(board))
+
+
+# The 8 symmetries of the board, as the cell (i, j) each cell is moved to
+SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i)
+]
+
+# For each symmetry, the image of every 9-bit mask
+SYMMETRY_TABLES = []
+for symmetry in SYMMETRIES:
+    moved = [None] * 9
     for i in range(3):
         for j in range(3):
-            if board[i][j] == EMPTY:
-                return False
+            k, l = symmetry(i, j)
+            moved[3 * i + j] = 1 << (3 * k + l)
+    table = [0] * 512
+    for mask in range(1, 512):
+        low = mask & -mask
+        table[mask] = table[mask ^ low] | moved[low.bit_length() - 1]
+    SYMMETRY_TABLES.append(table)
 
-    #return Trueif its a tie
-    return True
+# Cells in order of how many lines they are part of: centre, corners, edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
 
+# Bounds stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
 
+# Transposition table, from canonical board key to a value and its bound.
+# Values depend only on the position, so it is kept across searches.
+transpositions = dict()
 
 
-def utility(board):
+def canonical(xs, os):
     """
-    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    Returns a key that is the same for a bitboard and all of its rotations
+    and reflections: the smallest of their masks combined.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return min(table[xs] << 9 | table[os] for table in SYMMETRY_TABLES)
 
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    moves = []
-    evals_for_moves = []
-
-    if terminal(board):
+    xs, os = to_bitboard(board)
+    if bit_terminal(xs, os):
         return None
 
-    #storing every legal move in a list
-    for action in actions(board):
-        moves.append(action)
-
-    '''
-    if the AI is X, and it is the first move return
-    any random move, because all moves have the same
-    evaluation of 0, and for the sake of saving time.
-    '''
-    if player(board) == X and len(moves) == 9:
-        return moves[random.randrange(0, 8)]
-
-    #storing the evaluation of every possible move in a list based on the player.
-    for action in actions(board):
-
-        if player(board) == X:
-            current_eval = max_value(result(board, action))
-            evals_for_moves.append(current_eval)
-            if current_eval > evals_for_moves[-1]:
-                return action
-
-        elif player(board) == O:
-            current_eval = min_value(result(board, action))
-            evals_for_moves.append(current_eval)
-            if current_eval < evals_for_moves[-1]:
-                return action
-
-    #return the best move based on the player
-    if player(board) == X:
-        for i in range(len(evals_for_moves)):
-            if evals_for_moves[i] == max(evals_for_moves):
-                return moves[i]
-
-    elif player(board) == O:
-        for i in range(len(evals_for_moves)):
-            if evals_for_moves[i] == min(evals_for_moves):
-                return moves[i]
-
-
-def max_value(board):
-    if terminal(board):
-        return utility(board)
-    v = float('inf')
-    for action in actions(board):
-        v = min(v, min_value(result(board, action)))
-
-        #this statement is to implement Alpha-Beta pruning.
-        if v == -1:
-            return v
-
-    return v
+    # Search every move with alpha-beta bounds, keeping the first best one
+    maximizing = bit_player(xs, os) == X
+    taken = xs | os
+    alpha, beta = -math.inf, math.inf
+    best_cell = None
+    for cell in MOVE_ORDER:
+        if taken >> cell & 1:
+            continue
+        if maximizing:
+            value = min_value(xs | 1 << cell, os, alpha, beta)
+            if best_cell is None or value > alpha:
+                best_cell, alpha = cell, value
+        else:
+            value = max_value(xs, os | 1 << cell, alpha, beta)
+            if best_cell is None or value < beta:
+                best_cell, beta = cell, value
+        if alpha >= beta:
+            break
+    return divmod(best_cell, 3)
+
+
+def lookup(key, alpha, beta):
+    """
+    Returns a value from the transposition table if it settles the search
+    within (alpha, beta), and otherwise the bounds narrowed by the table.
+    """
+    value = None
+    if key in transpositions:
+        stored, bound = transpositions[key]
+        if bound == EXACT:
+            value = stored
+        elif bound == LOWER:
+            alpha = max(alpha, stored)
+        else:
+            beta = min(beta, stored)
+        if alpha >= beta:
+            value = stored
+    return value, alpha, beta
+
+
+def store(key, value, alpha, beta):
+    """
+    Stores a value found by searching within (alpha, beta): a value outside
+    the window is only a bound on the true value.
+    """
+    if value <= alpha:
+        transpositions[key] = (value, UPPER)
+    elif value >= beta:
+        transpositions[key] = (value, LOWER)
+    else:
+        transpositions[key] = (value, EXACT)
 
 
-def min_value(board):
-    if terminal(board):
-        return utility(board)
-    v = float('-inf')
-    for action in actions(board):
-        v = max(v, max_value(result(board, action)))
+def max_value(xs, os, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the value of a bitboard where X is to move, or a bound on it
+    outside of (alpha, beta).
+    """
+    if bit_terminal(xs, os):
+        return bit_utility(xs, os)
+    key = canonical(xs, os)
+    value, alpha_bound, beta_bound = lookup(key, alpha, beta)
+    if value is not None:
+        return value
+
+    v = -math.inf
+    a = alpha_bound
+    taken = xs | os
+    for cell in MOVE_ORDER:
+        if taken >> cell & 1:
+            continue
+        v = max(v, min_value(xs | 1 << cell, os, a, beta_bound))
+        a = max(a, v)
+        if a >= beta_bound:
+            break
+
+    store(key, v, alpha_bound, beta_bound)
+    return v
 
-        #this statement is to implement Alpha-Beta pruning.
-        if v == 1:
-            return v
 
-    return v
\ No newline at end of file
+def min_value(xs, os, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the value of a bitboard where O is to move, or a bound on it
+    outside of (alpha, beta).
+    """
+    if bit_terminal(xs, os):
+        return bit_utility(xs, os)
+    key = canonical(xs, os)
+    value, alpha_bound, beta_bound = lookup(key, alpha, beta)
+    if value is not None:
+        return value
+
+    v = math.inf
+    b = beta_bound
+    taken = xs | os
+    for cell in MOVE_ORDER:
+        if taken >> cell & 1:
+            continue
+        v = min(v, max_value(xs, os | 1 << cell, alpha_bound, b))
+        b = min(b, v)
+        if alpha_bound >= b:
+            break
+
+    store(key, v, alpha_bound, beta_bound)
+    return v